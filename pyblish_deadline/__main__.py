@@ -0,0 +1,7 @@
+import sys
+
+from pyblish_deadline import cli
+
+
+if __name__ == "__main__":
+    sys.exit(cli.main())
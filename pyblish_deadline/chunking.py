@@ -0,0 +1,302 @@
+"""Choose ChunkSize from the render times of similar jobs.
+
+Finished tasks are recorded in a local SQLite database by the event plugin,
+keyed by Deadline plugin, family and a scene complexity key. At submission,
+task time is modelled as a fixed startup cost plus a cost per frame, fitted
+to the history of similar jobs, and the chunk size giving the shortest
+render on the farm is chosen.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+
+
+log = logging.getLogger("pyblish_deadline")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    plugin TEXT NOT NULL,
+    family TEXT NOT NULL,
+    complexity TEXT NOT NULL,
+    frames INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    recorded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_key ON tasks (plugin, family, complexity);
+"""
+
+
+def frame_count(frames):
+    """Return the number of frames in a Deadline frame list, like 1-100x2"""
+
+    count = 0
+    for token in re.split(r"[,\s]+", str(frames).strip()):
+        if not token:
+            continue
+
+        match = re.match(r"^(-?\d+)(?:-(-?\d+))?(?:(?:x|:|step|by)(\d+))?$",
+                         token)
+        if not match:
+            raise ValueError("Invalid frame list: %r" % frames)
+
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else start
+        step = max(1, int(match.group(3) or 1))
+        count += abs(end - start) // step + 1
+
+    return count
+
+
+def task_seconds(task):
+    """Return the render time of a Deadline task in seconds"""
+
+    value = task.TaskRenderTime
+
+    # System.TimeSpan
+    if hasattr(value, "TotalSeconds"):
+        return float(value.TotalSeconds)
+
+    # "hh:mm:ss" or "d.hh:mm:ss"
+    if isinstance(value, str) and ":" in value:
+        days = 0
+        if "." in value.split(":")[0]:
+            days, value = value.split(".", 1)
+        hours, minutes, seconds = value.split(":")
+        return (int(days) * 86400 + int(hours) * 3600 +
+                int(minutes) * 60 + float(seconds))
+
+    return float(value)
+
+
+class History(object):
+    """Task render times in a SQLite database at `path`"""
+
+    def __init__(self, path):
+        self.path = path
+
+        connection = self._connect()
+        try:
+            connection.executescript(SCHEMA)
+        finally:
+            connection.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def record(self, plugin, family, complexity, tasks):
+        """Record `tasks`, a list of (frames, seconds) tuples"""
+
+        now = time.time()
+        rows = [(plugin, family or "", complexity or "",
+                 int(frames), float(seconds), now)
+                for frames, seconds in tasks if frames > 0]
+
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+        finally:
+            connection.close()
+
+    def record_job(self, job, tasks):
+        """Record the completed `tasks` of a finished Deadline `job`
+
+        Tasks with a render time that can not be read are skipped.
+        """
+
+        samples = []
+        for task in tasks:
+            if getattr(task, "TaskStatus", "Completed") != "Completed":
+                continue
+            try:
+                seconds = task_seconds(task)
+            except (ValueError, TypeError) as error:
+                log.warning("Skipping task %s: %s"
+                            % (getattr(task, "TaskId", ""), error))
+                continue
+            samples.append((len(task.TaskFrameList), seconds))
+
+        self.record(
+            job.JobPlugin,
+            job.GetJobExtraInfoKeyValueWithDefault("PyblishFamily", ""),
+            job.GetJobExtraInfoKeyValueWithDefault("PyblishComplexity", ""),
+            samples
+        )
+
+    def samples(self, plugin, family=None, complexity=None, limit=500):
+        """Return the most recent (frames, seconds) of similar tasks"""
+
+        query = "SELECT frames, seconds FROM tasks WHERE plugin = ?"
+        args = [plugin]
+        if family is not None:
+            query += " AND family = ?"
+            args.append(family)
+        if complexity is not None:
+            query += " AND complexity = ?"
+            args.append(complexity)
+        query += " ORDER BY recorded DESC LIMIT ?"
+        args.append(limit)
+
+        connection = self._connect()
+        try:
+            return connection.execute(query, args).fetchall()
+        finally:
+            connection.close()
+
+
+def fit(samples, default_startup=30.0):
+    """Fit seconds = startup + per_frame * frames to `samples`
+
+    Returns (startup, per_frame). When all samples have the same number of
+    frames, the two can not be told apart and `default_startup` is used,
+    capped at half the task time.
+    """
+
+    n = float(len(samples))
+    mean_frames = sum(f for f, s in samples) / n
+    mean_seconds = sum(s for f, s in samples) / n
+
+    variance = sum((f - mean_frames) ** 2 for f, s in samples)
+    if variance > 0:
+        covariance = sum((f - mean_frames) * (s - mean_seconds)
+                         for f, s in samples)
+        per_frame = covariance / variance
+        startup = mean_seconds - per_frame * mean_frames
+        if per_frame > 0 and startup >= 0:
+            return startup, per_frame
+
+    startup = min(default_startup, mean_seconds / 2.0)
+    per_frame = (mean_seconds - startup) / mean_frames
+    return startup, per_frame
+
+
+def best_chunk_size(frames, startup, per_frame, workers, max_chunk_size=None):
+    """Return the chunk size rendering `frames` fastest on `workers`
+
+    Tasks render in waves of `workers` at a time. Of chunk sizes with the
+    same render time, the largest is chosen, as it spends the least time
+    on startup.
+    """
+
+    workers = max(1, int(workers))
+    largest = min(frames, max_chunk_size or frames)
+
+    best, best_time = 1, None
+    for size in range(1, largest + 1):
+        tasks = -(-frames // size)
+        waves = -(-tasks // workers)
+        duration = waves * (startup + size * per_frame)
+        if best_time is None or duration <= best_time:
+            best, best_time = size, duration
+
+    return best
+
+
+class ChunkOptimizer(object):
+    """Set ChunkSize of jobs from the history of similar jobs
+
+    Arguments:
+        history (History): Render times to base the chunk size on.
+        workers (int): Number of workers expected to render a job.
+        min_samples (int): Tasks needed before a chunk size is chosen.
+        default_startup (float): Seconds of task startup to assume, when
+            the history can not tell startup and render time apart.
+        max_chunk_size (int, optional): Largest chunk size to choose.
+
+    """
+
+    def __init__(self, history, workers=10, min_samples=5,
+                 default_startup=30.0, max_chunk_size=None):
+        self.history = history
+        self.workers = workers
+        self.min_samples = min_samples
+        self.default_startup = default_startup
+        self.max_chunk_size = max_chunk_size
+
+    def chunk_size(self, plugin, family, complexity, frames):
+        """Return the chunk size for a job, or None without enough history"""
+
+        # widening the search from the exact job, to the plugin alone
+        for key in ((family, complexity), (family, None), (None, None)):
+            samples = self.history.samples(plugin, *key)
+            if len(samples) >= self.min_samples:
+                break
+        else:
+            return None
+
+        startup, per_frame = fit(samples, self.default_startup)
+        return best_chunk_size(frame_count(frames), startup, per_frame,
+                               self.workers, self.max_chunk_size)
+
+    def optimize(self, job):
+        """Return a copy of `job` with an optimized ChunkSize
+
+        `job` is returned unchanged when it has no frames, there is not
+        enough history of similar jobs, or the history can not be read.
+        """
+
+        job_data = job["job"]
+        if not job_data.get("Frames") or not job_data.get("Plugin"):
+            return job
+
+        try:
+            size = self.chunk_size(job_data["Plugin"],
+                                   job.get("family", ""),
+                                   job.get("complexity", ""),
+                                   job_data["Frames"])
+        except (ValueError, sqlite3.Error) as error:
+            log.warning("Keeping ChunkSize: %s" % error)
+            return job
+
+        if size is None:
+            return job
+
+        log.info("ChunkSize of \"%s\" set to %s, from %s."
+                 % (job_data.get("Name", ""), size,
+                    job_data.get("ChunkSize", "default")))
+
+        job = dict(job)
+        job["job"] = dict(job_data, ChunkSize=size)
+        return job
+
+
+def optimizer(path, workers=10):
+    """Return an optimizer using the history at `path`
+
+    Returns None when the history can not be opened, leaving the ChunkSize
+    of jobs as it is.
+    """
+
+    try:
+        history = History(path)
+    except sqlite3.Error as error:
+        log.warning("Keeping ChunkSize, could not open history "
+                    "\"%s\": %s" % (path, error))
+        return None
+
+    return ChunkOptimizer(history, workers)
+
+
+def from_environment():
+    """Return an optimizer from environment variables, if configured
+
+    PYBLISH_DEADLINE_HISTORY is the path of the history database, and
+    PYBLISH_DEADLINE_FARM_WORKERS the number of workers to optimize for.
+    """
+
+    path = os.environ.get("PYBLISH_DEADLINE_HISTORY")
+    if not path:
+        return None
+
+    try:
+        workers = int(os.environ.get("PYBLISH_DEADLINE_FARM_WORKERS", 10))
+    except ValueError:
+        log.warning("Invalid PYBLISH_DEADLINE_FARM_WORKERS, using 10.")
+        workers = 10
+
+    return optimizer(path, workers)
@@ -0,0 +1,197 @@
+"""Command line interface
+
+Usage:
+    pyblish-deadline submit manifest.json --workers 4 --batch-size 10 --wait
+    pyblish-deadline replay events.jsonl --rate 50 --duration 600
+
+A manifest is a json list of `deadlineData` shaped jobs, or an object with
+such a list under "jobs". Each job may carry "contextData" and
+"instanceData" dictionaries, which are passed on to the Pyblish event plugin
+as `PyblishContextData` and `PyblishInstanceData`.
+
+"""
+
+import sys
+import json
+import logging
+import argparse
+
+from pyblish_deadline import submission, offline, replay, chunking
+
+
+def load_manifest(path):
+    if path == "-":
+        manifest = json.load(sys.stdin)
+    else:
+        with open(path) as f:
+            manifest = json.load(f)
+
+    if isinstance(manifest, dict):
+        manifest = manifest["jobs"]
+
+    return [prepare_job(job) for job in manifest]
+
+
+def prepare_job(job):
+    job = dict(job)
+    job_data = dict(job["job"])
+    extra_info = dict(job_data.get("ExtraInfoKeyValue", {}))
+
+    if "instanceData" in job:
+        job.setdefault("family", job["instanceData"].get("family"))
+
+    for key, name in (("contextData", "PyblishContextData"),
+                      ("instanceData", "PyblishInstanceData")):
+        if key in job:
+            extra_info[name] = submission.serialize_data(job.pop(key), key)
+
+    if extra_info:
+        job_data["ExtraInfoKeyValue"] = extra_info
+
+    job["job"] = job_data
+    return job
+
+
+def submit(args):
+    jobs = load_manifest(args.manifest)
+    names = [job["job"].get("Name") for job in jobs]
+    orders = [job.get("order") for job in jobs]
+
+    if args.history:
+        optimizer = chunking.optimizer(args.history, args.farm_workers)
+    else:
+        optimizer = chunking.from_environment()
+
+    code = 0
+    try:
+        job_ids = submission.submit(jobs,
+                                    workers=args.workers,
+                                    batch_size=args.batch_size,
+                                    optimizer=optimizer)
+    except submission.SubmissionError as error:
+        # printing the jobs submitted before the failure
+        logging.getLogger("pyblish_deadline").error(str(error))
+        job_ids = error.job_ids
+        code = 1
+
+    states = {}
+    if args.wait and not code:
+        try:
+            states = submission.wait_for_jobs(job_ids, timeout=args.timeout)
+        except submission.WaitTimeout as error:
+            # printing the last known states
+            logging.getLogger("pyblish_deadline").error(str(error))
+            states = error.states
+            code = 1
+
+        if any(state in submission.FAILED_STATES
+               for state in states.values()):
+            code = 1
+
+    results = []
+    for name, order, job_id in zip(names, orders, job_ids):
+        result = {"name": name, "order": order, "jobId": job_id}
+        if job_id in states:
+            result["status"] = states[job_id]
+        results.append(result)
+
+    json.dump(results, sys.stdout, indent=4)
+    sys.stdout.write("\n")
+
+    return code
+
+
+def replay_events(args):
+    if args.events:
+        events = replay.load_events(args.events)
+    else:
+        events = replay.synthetic(args.synthetic,
+                                  payload_size=args.payload_size)
+
+    if args.config:
+        with open(args.config) as f:
+            offline.repository.configs["Pyblish"].update(json.load(f))
+
+    # keeping stdout for the report, as the event plugin prints
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        report = replay.replay(events, rate=args.rate,
+                               duration=args.duration,
+                               trace_memory=args.trace_memory)
+    finally:
+        sys.stdout = stdout
+
+    json.dump(report, sys.stdout, indent=4)
+    sys.stdout.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pyblish-deadline")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Log job and plugin info to stderr.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    # accepting --verbose after the command too, without overriding it
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--verbose", action="store_true",
+                        default=argparse.SUPPRESS,
+                        help="Log job and plugin info to stderr.")
+
+    parser_submit = subparsers.add_parser(
+        "submit", parents=[common],
+        help="Submit the jobs of a json manifest."
+    )
+    parser_submit.add_argument("manifest",
+                               help="Path to the manifest, or - for stdin.")
+    parser_submit.add_argument("--workers", type=int, default=1,
+                               help="Concurrent submissions per order.")
+    parser_submit.add_argument("--batch-size", type=int, default=1,
+                               help="Jobs per deadlinecommand call.")
+    parser_submit.add_argument("--history",
+                               help="Render history database to choose "
+                                    "ChunkSize from.")
+    parser_submit.add_argument("--farm-workers", type=int, default=10,
+                               help="Workers to choose ChunkSize for.")
+    parser_submit.add_argument("--wait", action="store_true",
+                               help="Wait for the jobs to finish.")
+    parser_submit.add_argument("--timeout", type=float, default=3600,
+                               help="Seconds to wait for the jobs.")
+    parser_submit.set_defaults(func=submit)
+
+    parser_replay = subparsers.add_parser(
+        "replay", parents=[common],
+        help="Replay events through the event plugin, offline."
+    )
+    parser_replay.add_argument("events", nargs="?",
+                               help="Json lines file of recorded events.")
+    parser_replay.add_argument("--synthetic", type=int, default=100,
+                               help="Number of synthetic events to generate, "
+                                    "when no events are given.")
+    parser_replay.add_argument("--payload-size", type=int, default=1024,
+                               help="Bytes of context data per synthetic "
+                                    "event.")
+    parser_replay.add_argument("--config",
+                               help="Json file of event plugin config "
+                                    "entries.")
+    parser_replay.add_argument("--rate", type=float,
+                               help="Events per second, unlimited by "
+                                    "default.")
+    parser_replay.add_argument("--duration", type=float,
+                               help="Seconds to replay for, repeating the "
+                                    "events. One pass by default.")
+    parser_replay.add_argument("--trace-memory", action="store_true",
+                               help="Replay a second time under tracemalloc, "
+                                    "reporting memory allocated by Python.")
+    parser_replay.set_defaults(func=replay_events)
+
+    args = parser.parse_args(argv)
+
+    if not getattr(args, "func", None):
+        parser.print_help()
+        return 1
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING
+    )
+
+    return args.func(args) or 0
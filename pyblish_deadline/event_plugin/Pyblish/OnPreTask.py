@@ -1,5 +1,6 @@
 import sys
 import os
+import time
 import logging
 import json
 
@@ -7,6 +8,7 @@ import Deadline.Scripting as ds
 
 
 def __main__(*args):
+    start = time.time()
     plugin_config = ds.RepositoryUtils.GetEventPluginConfig("Pyblish")
 
     # returning early if no plugins are configured
@@ -19,7 +21,7 @@ def __main__(*args):
     paths = paths.split(";")
 
     for path in paths:
-        print "Extending sys.path with: " + str(path)
+        print("Extending sys.path with: " + str(path))
         sys.path.append(path)
 
     # clearing previous plugin paths,
@@ -37,7 +39,7 @@ def __main__(*args):
         else:
             path = adding_paths
 
-        print "Setting PYBLISHPLUGINPATH to: \"%s\"" % path
+        print("Setting PYBLISHPLUGINPATH to: \"%s\"" % path)
         os.environ["PYBLISHPLUGINPATH"] = str(path)
 
     # setup logging
@@ -60,8 +62,8 @@ def __main__(*args):
         __import__("pyblish.api")
     except ImportError:
         import traceback
-        print ("Could not load module \"pyblish.api\": %s"
-               % traceback.format_exc())
+        print("Could not load module \"pyblish.api\": %s"
+              % traceback.format_exc())
         return
 
     # setup context and injecting deadline job and additional data
@@ -82,23 +84,54 @@ def __main__(*args):
 
     # recreate context from data
     data = job.GetJobExtraInfoKeyValueWithDefault("PyblishContextData", "")
+    payload_size = len(data)
     if data:
         data = json.loads(data)
         cxt.data.update(data)
     else:
         logger.warning("No Pyblish data found.")
 
+    # recreate the submitting instance, decoding its data on first use
+    try:
+        from pyblish_deadline import lazy
+    except ImportError:
+        lazy = None
+
+    if lazy:
+        lazy.create_instance(cxt, job)
+
     cxt.data["deadlineEvent"] = "OnPreTask"
 
     # setup username
     os.environ["LOGNAME"] = job.UserName
 
-    # run publish
+    # run publish, with instances published concurrently when configured
     import pyblish.util
 
     logging.getLogger("pyblish").setLevel(level)
 
-    cxt = pyblish.util.publish(context=cxt)
+    workers = int(plugin_config.GetConfigEntryWithDefault("PublishWorkers",
+                                                          "1"))
+    try:
+        from pyblish_deadline import parallel
+    except ImportError:
+        parallel = None
+
+    if workers > 1 and parallel:
+        cxt = parallel.publish(context=cxt, workers=workers)
+    else:
+        cxt = pyblish.util.publish(context=cxt)
+
+    # record metrics, if pyblish_deadline is available
+    try:
+        from pyblish_deadline import metrics
+    except ImportError:
+        metrics = None
+
+    if metrics:
+        metrics = metrics.from_config(plugin_config)
+        metrics.record_publish("OnPreTask", cxt, time.time() - start, payload_size)
+        metrics.flush()
 
     # error logging needs some work
     for result in cxt.data["results"]:
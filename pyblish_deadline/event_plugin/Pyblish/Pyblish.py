@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import logging
 import json
 
@@ -15,6 +16,65 @@ def CleanupDeadlineEventListener(eventListener):
     eventListener.Cleanup()
 
 
+def get_metrics(config):
+    # Metrics are only recorded when pyblish_deadline is importable.
+    try:
+        from pyblish_deadline import metrics
+    except ImportError:
+        return None
+
+    return metrics.from_config(config)
+
+
+def create_instance(context, job):
+    # The submitting instance is only recreated when pyblish_deadline is
+    # importable.
+    try:
+        from pyblish_deadline import lazy
+    except ImportError:
+        return None
+
+    return lazy.create_instance(context, job)
+
+
+def record_history(config, job):
+    # Render times are only recorded when a history is configured, and
+    # pyblish_deadline is importable.
+    path = config.GetConfigEntryWithDefault("ChunkHistoryPath", "").strip()
+    if not path:
+        return
+
+    try:
+        from pyblish_deadline import chunking
+    except ImportError:
+        return
+
+    try:
+        tasks = ds.RepositoryUtils.GetJobTasks(job, True)
+        chunking.History(path).record_job(job, tasks)
+    except Exception:
+        # recording render history must never break a publish
+        import traceback
+        config.LogWarning("Could not record render history: %s"
+                          % traceback.format_exc())
+
+
+def publish(config, context):
+    # Instances are published concurrently when more than one worker is
+    # configured, and pyblish_deadline is importable.
+    workers = int(config.GetConfigEntryWithDefault("PublishWorkers", "1"))
+    if workers > 1:
+        try:
+            from pyblish_deadline import parallel
+        except ImportError:
+            pass
+        else:
+            return parallel.publish(context=context, workers=workers)
+
+    import pyblish.util
+    return pyblish.util.publish(context=context)
+
+
 class PyblishEventListener(Deadline.Events.DeadlineEventListener):
 
     def __init__(self):
@@ -77,6 +137,7 @@ class PyblishEventListener(Deadline.Events.DeadlineEventListener):
 
     def run_pyblish(self, config_entry, job, additonalData={}):
 
+        start = time.time()
         plugin_dir = ds.RepositoryUtils.GetEventPluginDirectory("Pyblish")
 
         # Activating pre and post task scripts, if paths are configured.
@@ -128,6 +189,12 @@ class PyblishEventListener(Deadline.Events.DeadlineEventListener):
         else:
             adding_paths.replace(";", os.pathsep)
 
+            # dropping empty entries, which pyblish reads as the current
+            # working directory
+            adding_paths = os.pathsep.join(
+                p for p in adding_paths.split(os.pathsep) if p
+            )
+
             if path != "":
                 path = path + os.pathsep + adding_paths
             else:
@@ -172,20 +239,29 @@ class PyblishEventListener(Deadline.Events.DeadlineEventListener):
 
         # Recreate context from data.
         data = job.GetJobExtraInfoKeyValueWithDefault("PyblishContextData", "")
+        payload_size = len(data)
         if data:
             data = json.loads(data)
             cxt.data.update(data)
         else:
             logger.warning("No Pyblish data found.")
 
+        # Recreate the submitting instance, decoding its data on first use.
+        create_instance(cxt, job)
+
         cxt.data["deadlineEvent"] = config_entry.replace("Paths", "")
 
         # Run publish.
-        import pyblish.util
-
         logging.getLogger("pyblish").setLevel(level)
 
-        cxt = pyblish.util.publish(context=cxt)
+        cxt = publish(self, cxt)
+
+        # Record metrics.
+        metrics = get_metrics(self)
+        if metrics:
+            metrics.record_publish(cxt.data["deadlineEvent"], cxt,
+                                   time.time() - start, payload_size)
+            metrics.flush()
 
         # Error logging needs some work.
         for result in cxt.data["results"]:
@@ -210,6 +286,7 @@ class PyblishEventListener(Deadline.Events.DeadlineEventListener):
     def OnJobFinished(self, job):
 
         self.run_pyblish("OnJobFinishedPaths", job)
+        record_history(self, job)
 
     def OnJobRequeued(self, job):
 
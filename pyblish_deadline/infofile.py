@@ -0,0 +1,121 @@
+"""Encode and parse Deadline job and plugin info files.
+
+Info files are plain `key=value` lines, split on the first "=". Deadline has
+no escaping, so values are written as they are, and keys can not contain "="
+or newlines. Newlines can not be held by a value either; they are replaced
+with a literal "\\n" to keep each entry on a single line, which `load` does
+not undo.
+
+The `ExtraInfo`, `ExtraInfoKeyValue` and `EnvironmentKeyValue` entries of a
+job are expanded into their numbered keys, and parsed back into a list and
+dictionaries.
+"""
+
+import re
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+KEY_VALUE_ENTRIES = ("ExtraInfoKeyValue", "EnvironmentKeyValue")
+
+
+def _key(key):
+    key = "%s" % key
+    if "=" in key or "\n" in key or "\r" in key:
+        raise ValueError("Invalid info file key: %r" % key)
+    return key
+
+
+def _value(value):
+    value = "%s" % value
+    if "\n" in value or "\r" in value:
+        value = value.replace("\r\n", "\\n")
+        value = value.replace("\n", "\\n").replace("\r", "\\n")
+    return value
+
+
+def dump_job(job_data, stream, dependencies=()):
+    """Write `job_data` to `stream`, depending on job ids in `dependencies`
+
+    `job_data` is not modified.
+    """
+
+    write = stream.write
+
+    for key, value in job_data.items():
+        if key == "ExtraInfo":
+            for index, item in enumerate(value):
+                write("ExtraInfo%d=%s\n" % (index, _value(item)))
+
+        elif key in KEY_VALUE_ENTRIES:
+            for index, entry in enumerate(value):
+                write("%s%d=%s=%s\n" % (key, index, _key(entry),
+                                        _value(value[entry])))
+
+        else:
+            write("%s=%s\n" % (_key(key), _value(value)))
+
+    for index, job_id in enumerate(dependencies):
+        write("JobDependency%d=%s\n" % (index, _value(job_id)))
+
+
+def dump_plugin(plugin_data, stream):
+    """Write `plugin_data` to `stream`"""
+
+    write = stream.write
+    for key, value in plugin_data.items():
+        write("%s=%s\n" % (_key(key), _value(value)))
+
+
+def dumps_job(job_data, dependencies=()):
+    buf = StringIO()
+    dump_job(job_data, buf, dependencies)
+    return buf.getvalue()
+
+
+def dumps_plugin(plugin_data):
+    buf = StringIO()
+    dump_plugin(plugin_data, buf)
+    return buf.getvalue()
+
+
+def load(stream):
+    """Parse an info file from `stream`
+
+    Numbered `ExtraInfo` entries are returned as a list, in index order, and
+    numbered `ExtraInfoKeyValue` and `EnvironmentKeyValue` entries as
+    dictionaries. All other values are returned as strings.
+    """
+
+    data = {}
+    extra_info = {}
+
+    pattern = re.compile(r"^(ExtraInfo|%s)(\d+)$" % "|".join(KEY_VALUE_ENTRIES))
+
+    for line in stream:
+        line = line.rstrip("\r\n")
+        if not line or "=" not in line:
+            continue
+
+        key, value = line.split("=", 1)
+
+        match = pattern.match(key)
+        if not match:
+            data[key] = value
+        elif match.group(1) == "ExtraInfo":
+            extra_info[int(match.group(2))] = value
+        else:
+            entry, _, entry_value = value.partition("=")
+            data.setdefault(match.group(1), {})[entry] = entry_value
+
+    if extra_info:
+        data["ExtraInfo"] = [extra_info[i] for i in sorted(extra_info)]
+
+    return data
+
+
+def loads(text):
+    return load(StringIO(text))
@@ -0,0 +1,151 @@
+"""Recreate the submitting instance on the Deadline event side.
+
+The instance data submitted as `PyblishInstanceData` is only decoded the
+first time the data of the instance is used, and only once.
+
+The instance is named after the job, as its submitted name is not known
+until the data is decoded. instance.data["name"] is kept equal to the name
+of the instance, while the name it was submitted with is available as
+instance.data["deadlineInstanceName"].
+"""
+
+import copy
+import json
+import threading
+
+import pyblish.plugin
+
+
+# pyblish.plugin._Dict supports the data("key") form of older plug-ins.
+_Dict = getattr(pyblish.plugin, "_Dict", dict)
+
+# shared by all instances, so their data can be copied and pickled
+_lock = threading.Lock()
+
+
+def _loading(method):
+    def wrapper(self, *args, **kwargs):
+        if self._raw is not None:
+            self._load()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+
+def _decode(raw, name):
+    """Decode instance data, keeping `name` as the name of the instance"""
+
+    data = json.loads(raw)
+    if "name" in data:
+        data["deadlineInstanceName"] = data.pop("name")
+    data["name"] = name
+    return data
+
+
+class LazyData(_Dict):
+    """Instance data decoded from json on first use
+
+    Items present before decoding, such as the defaults of an instance, are
+    overridden by the decoded data. Deep copies are decoded, plain instance
+    data.
+    """
+
+    # decoded, until set by __init__; unpickling sets items before state
+    _raw = None
+
+    def __init__(self, parent, raw):
+        if _Dict is dict:
+            super(LazyData, self).__init__()
+        else:
+            super(LazyData, self).__init__(parent)
+        self._raw = raw
+        self._name = parent.name
+
+    @property
+    def loaded(self):
+        return self._raw is None
+
+    def _load(self):
+        with _lock:
+            if self._raw is None:
+                return
+            data = _decode(self._raw, self._name)
+            self._raw = None
+            dict.update(self, data)
+
+    __getitem__ = _loading(_Dict.__getitem__)
+    __setitem__ = _loading(_Dict.__setitem__)
+    __delitem__ = _loading(_Dict.__delitem__)
+    __contains__ = _loading(_Dict.__contains__)
+    __iter__ = _loading(_Dict.__iter__)
+    __len__ = _loading(_Dict.__len__)
+    __eq__ = _loading(_Dict.__eq__)
+    __ne__ = _loading(_Dict.__ne__)
+    __repr__ = _loading(_Dict.__repr__)
+    get = _loading(_Dict.get)
+    keys = _loading(_Dict.keys)
+    values = _loading(_Dict.values)
+    items = _loading(_Dict.items)
+    pop = _loading(_Dict.pop)
+    popitem = _loading(_Dict.popitem)
+    setdefault = _loading(_Dict.setdefault)
+    update = _loading(_Dict.update)
+    copy = _loading(_Dict.copy)
+    clear = _loading(_Dict.clear)
+
+    # Python 2
+    if hasattr(dict, "iteritems"):
+        has_key = _loading(_Dict.has_key)
+        iterkeys = _loading(_Dict.iterkeys)
+        itervalues = _loading(_Dict.itervalues)
+        iteritems = _loading(_Dict.iteritems)
+
+    __hash__ = None
+
+    def __deepcopy__(self, memo):
+        if _Dict is dict:
+            result = {}
+        else:
+            result = _Dict(None)
+        memo[id(self)] = result
+
+        if _Dict is not dict:
+            result._parent = copy.deepcopy(self._parent, memo)
+
+        for key, value in self.items():
+            dict.__setitem__(result, copy.deepcopy(key, memo),
+                             copy.deepcopy(value, memo))
+
+        return result
+
+
+def create_instance(context, job):
+    """Add the instance `job` was submitted from to `context`
+
+    The instance is named after the job, with its data decoded lazily from
+    `PyblishInstanceData`. Where pyblish does not keep instance data in
+    `Instance._data`, the data is decoded right away instead. Returns None
+    for jobs without instance data.
+    """
+
+    if job is None:
+        return None
+
+    raw = job.GetJobExtraInfoKeyValueWithDefault("PyblishInstanceData", "")
+    if not raw:
+        return None
+
+    instance = context.create_instance(str(job.JobName))
+
+    if getattr(instance, "_data", None) is not instance.data:
+        instance.data.update(_decode(raw, instance.name))
+        instance.data["deadlineRehydrated"] = True
+        return instance
+
+    data = LazyData(instance, raw)
+    dict.update(data, instance.data)
+    dict.__setitem__(data, "deadlineRehydrated", True)
+    instance._data = data
+
+    return instance
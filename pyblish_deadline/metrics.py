@@ -0,0 +1,357 @@
+"""Counters and latency histograms for the Deadline event side.
+
+Measurements are aggregated in memory and written out once per event, either
+to a Prometheus textfile (for the node exporter textfile collector) or as
+StatsD lines over UDP.
+"""
+
+import os
+import re
+import socket
+import logging
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+# seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                    1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PREFIX = "pyblish_deadline"
+
+log = logging.getLogger("pyblish_deadline")
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape_label(value):
+    value = str(value).replace("\\", "\\\\").replace("\"", "\\\"")
+    return value.replace("\n", "\\n")
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    pairs = ["%s=\"%s\"" % (k, _escape_label(v)) for k, v in labels]
+    return "%s{%s}" % (name, ",".join(pairs))
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+@contextmanager
+def _file_lock(path):
+    """Hold an exclusive lock on `path` across processes"""
+
+    with open(path, "a+") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class NullSink(object):
+
+    def increment(self, name, value, labels):
+        pass
+
+    def observe(self, name, value, labels, buckets):
+        pass
+
+    def flush(self):
+        pass
+
+
+class PrometheusTextfileSink(object):
+    """Aggregate in memory and merge into a Prometheus textfile on flush.
+
+    Counters and histogram series are additive, so the deltas collected by
+    this process are added to whatever the file already holds. The merge
+    holds a lock on a ".lock" file next to it, as the event listener and
+    task scripts run in separate processes. The file is replaced atomically,
+    so the collector never reads a partial file. Malformed lines are
+    dropped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def increment(self, name, value, labels):
+        key = (name + "_total", labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels, buckets):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                bounds = tuple(buckets) + (float("inf"),)
+                histogram = [bounds, [0] * len(bounds), 0.0, 0]
+                self._histograms[key] = histogram
+
+            bounds, counts = histogram[0], histogram[1]
+            for index, bound in enumerate(bounds):
+                if value <= bound:
+                    counts[index] += 1
+            histogram[2] += value
+            histogram[3] += 1
+
+    def flush(self):
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            histograms, self._histograms = self._histograms, {}
+
+        if not counters and not histograms:
+            return
+
+        with _file_lock(self.path + ".lock"):
+            self._merge(counters, histograms)
+
+    def _merge(self, counters, histograms):
+        types, samples = self._read()
+
+        for (name, labels), value in counters.items():
+            types[name] = "counter"
+            series = _series(name, labels)
+            samples[series] = samples.get(series, 0) + value
+
+        for (name, labels), histogram in histograms.items():
+            bounds, counts, total, count = histogram
+            types[name] = "histogram"
+            for bound, bucket_count in zip(bounds, counts):
+                bucket_labels = labels + (("le", _format_bound(bound)),)
+                series = _series(name + "_bucket", bucket_labels)
+                samples[series] = samples.get(series, 0) + bucket_count
+            for suffix, value in (("_sum", total), ("_count", count)):
+                series = _series(name + suffix, labels)
+                samples[series] = samples.get(series, 0) + value
+
+        self._write(types, samples)
+
+    def _read(self):
+        types = {}
+        samples = {}
+
+        if not os.path.exists(self.path):
+            return types, samples
+
+        with open(self.path) as f:
+            for line in f:
+                line = line.strip()
+                try:
+                    if line.startswith("# TYPE "):
+                        name, kind = line[len("# TYPE "):].split(" ", 1)
+                        types[name] = kind
+                    elif line and not line.startswith("#"):
+                        series, value = line.rsplit(" ", 1)
+                        samples[series] = float(value)
+                except ValueError:
+                    continue
+
+        return types, samples
+
+    def _write(self, types, samples):
+        lines = []
+        for name in sorted(types):
+            lines.append("# TYPE %s %s" % (name, types[name]))
+            for series in sorted(samples):
+                family = re.match(r"[^{]*", series).group(0)
+                if family == name or (
+                        types[name] == "histogram" and
+                        family in (name + "_bucket",
+                                   name + "_sum",
+                                   name + "_count")):
+                    lines.append("%s %r" % (series, samples[series]))
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(handle, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+        # os.replace is not available on Python 2.
+        if hasattr(os, "replace"):
+            os.replace(temp_path, self.path)
+        else:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(temp_path, self.path)
+
+
+class StatsdSink(object):
+    """Buffer StatsD lines and send them over UDP on flush.
+
+    StatsD has no labels, so label values are appended to the metric name.
+    Durations are sent as millisecond timers, everything else as histograms.
+    """
+
+    max_packet_size = 512
+
+    def __init__(self, host="127.0.0.1", port=8125):
+        self.address = (host, int(port))
+        self._lock = threading.Lock()
+        self._lines = []
+
+    def increment(self, name, value, labels):
+        self._append("%s:%s|c" % (self._name(name, labels), value))
+
+    def observe(self, name, value, labels, buckets):
+        if name.endswith("_seconds"):
+            line = "%s:%g|ms" % (self._name(name, labels), value * 1000.0)
+        else:
+            line = "%s:%g|h" % (self._name(name, labels), value)
+        self._append(line)
+
+    def flush(self):
+        with self._lock:
+            lines, self._lines = self._lines, []
+
+        if not lines:
+            return
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            packet = ""
+            for line in lines:
+                if packet and len(packet) + len(line) + 1 > \
+                        self.max_packet_size:
+                    self._send(sock, packet)
+                    packet = ""
+                packet = packet + "\n" + line if packet else line
+            self._send(sock, packet)
+        finally:
+            sock.close()
+
+    def _send(self, sock, packet):
+        try:
+            sock.sendto(packet.encode("utf-8"), self.address)
+        except socket.error:
+            # metrics must never break a publish
+            pass
+
+    def _append(self, line):
+        with self._lock:
+            self._lines.append(line)
+
+    def _name(self, name, labels):
+        parts = [name]
+        for key, value in labels:
+            parts.append(re.sub(r"[^A-Za-z0-9_\-]", "_", str(value)))
+        return ".".join(parts)
+
+
+class Metrics(object):
+
+    def __init__(self, sink=None):
+        self.sink = sink or NullSink()
+
+    def increment(self, name, labels=None, value=1):
+        self.sink.increment(PREFIX + "_" + name, value, _label_key(labels))
+
+    def observe(self, name, value, labels=None, buckets=DURATION_BUCKETS):
+        self.sink.observe(
+            PREFIX + "_" + name, value, _label_key(labels), buckets
+        )
+
+    @contextmanager
+    def timer(self, name, labels=None):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.observe(name, time.time() - start, labels)
+
+    def record_publish(self, event, context, duration, payload_size=None):
+        """Record the outcome of a publish triggered by `event`"""
+
+        labels = {"event": event}
+        self.increment("events", labels)
+        self.observe("event_duration_seconds", duration, labels)
+
+        if payload_size is not None:
+            self.observe("payload_bytes", payload_size, labels, SIZE_BUCKETS)
+
+        for result in context.data.get("results", []):
+            plugin = result.get("plugin")
+            labels = {
+                "event": event,
+                "plugin": getattr(plugin, "__name__", str(plugin)),
+                "result": "success" if result.get("success") else "failure"
+            }
+            self.increment("plugin_results", labels)
+
+            # pyblish reports durations in milliseconds
+            duration = result.get("duration")
+            if duration is not None:
+                self.observe("plugin_duration_seconds",
+                             duration / 1000.0,
+                             labels)
+
+    def flush(self):
+        try:
+            self.sink.flush()
+        except (IOError, OSError, ValueError):
+            # metrics must never break a publish
+            pass
+
+
+def from_config(config):
+    """Create metrics from an event plugin config
+
+    `config` is anything with `GetConfigEntryWithDefault`, such as the
+    event listener or the config returned by `GetEventPluginConfig`. An
+    invalid StatsD address logs a warning and disables metrics.
+    """
+
+    kind = config.GetConfigEntryWithDefault("MetricsSink", "None")
+
+    if kind == "Prometheus":
+        path = config.GetConfigEntryWithDefault("MetricsTextfilePath", "")
+        path = path.strip()
+        if path:
+            return Metrics(PrometheusTextfileSink(path))
+
+    if kind == "StatsD":
+        address = config.GetConfigEntryWithDefault("MetricsStatsdAddress",
+                                                   "127.0.0.1:8125")
+        host, _, port = address.strip().partition(":")
+        try:
+            port = int(port or 8125)
+        except ValueError:
+            # metrics must never break a publish
+            log.warning("Invalid Metrics StatsD Address \"%s\", "
+                        "metrics are disabled." % address)
+            return Metrics()
+        return Metrics(StatsdSink(host or "127.0.0.1", port))
+
+    return Metrics()
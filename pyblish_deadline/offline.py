@@ -0,0 +1,288 @@
+"""Offline stand-in for the Deadline scripting API.
+
+Provides enough of `Deadline.Events` and `Deadline.Scripting` to import and
+run the event plugin and task scripts outside of a Deadline repository.
+
+    from pyblish_deadline import offline
+
+    offline.repository.configs["Pyblish"]["OnJobFinishedPaths"] = "/plugins"
+    module = offline.load_event_plugin()
+    listener = module.GetDeadlineEventListener()
+    listener.OnJobFinished(offline.Job.from_info({"Name": "test"}))
+
+    offline.repository.configs["Pyblish"]["OnPreTaskPaths"] = "/plugins"
+    offline.run_task_script("OnPreTask", offline.Job.from_info({}))
+
+"""
+
+import os
+import sys
+import types
+import uuid
+
+from pyblish_deadline import infofile
+
+
+EVENT_PLUGIN_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "event_plugin", "Pyblish"
+)
+
+
+class Callback(object):
+    """Stand-in for a .NET event, supporting += and -="""
+
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        self.handlers.remove(handler)
+        return self
+
+    def __call__(self, *args):
+        for handler in self.handlers:
+            handler(*args)
+
+
+class Config(object):
+
+    def __init__(self, entries=None):
+        self.entries = entries if entries is not None else {}
+
+    def GetConfigEntry(self, key):
+        return self.entries[key]
+
+    def GetConfigEntryWithDefault(self, key, default):
+        return self.entries.get(key, default)
+
+
+class Task(object):
+
+    def __init__(self, task_id="0", frames=(), status="Queued",
+                 render_time=0.0):
+        self.TaskId = task_id
+        self.TaskFrameList = list(frames)
+        self.TaskStatus = status
+        self.TaskRenderTime = render_time
+
+
+class Job(object):
+
+    def __init__(self, job_id=None, name="", user_name="", plugin="",
+                 extra_info=None, environment=None, frames=""):
+        self.JobId = job_id or uuid.uuid4().hex[:24]
+        self.JobName = name
+        self.UserName = user_name
+        self.JobUserName = user_name
+        self.JobPlugin = plugin
+        self.JobFrames = frames
+        self.JobStatus = "Active"
+        self.JobPreTaskScript = ""
+        self.JobPostTaskScript = ""
+        self.JobExtraInfo = []
+        self._extra_info = dict(extra_info or {})
+        self._environment = dict(environment or {})
+
+    @classmethod
+    def from_info(cls, info):
+        """Create a job from job info, as parsed by `infofile.load`"""
+
+        job = cls(job_id=info.get("JobId"),
+                  name=info.get("Name", ""),
+                  user_name=info.get("UserName", ""),
+                  plugin=info.get("Plugin", ""),
+                  extra_info=info.get("ExtraInfoKeyValue"),
+                  environment=info.get("EnvironmentKeyValue"),
+                  frames=info.get("Frames", ""))
+        job.JobExtraInfo = list(info.get("ExtraInfo", []))
+        return job
+
+    @classmethod
+    def from_file(cls, path):
+        """Create a job from a job info file"""
+
+        with open(path) as f:
+            return cls.from_info(infofile.load(f))
+
+    def GetJobExtraInfoKeys(self):
+        return list(self._extra_info)
+
+    def GetJobExtraInfoKeyValue(self, key):
+        return self._extra_info.get(key, "")
+
+    def GetJobExtraInfoKeyValueWithDefault(self, key, default):
+        return self._extra_info.get(key, default)
+
+    def SetJobExtraInfoKeyValue(self, key, value):
+        self._extra_info[key] = value
+
+    def GetJobEnvironmentKeys(self):
+        return list(self._environment)
+
+    def GetJobEnvironmentKeyValue(self, key):
+        return self._environment.get(key, "")
+
+    def SetJobEnvironmentKeyValue(self, key, value):
+        self._environment[key] = value
+
+
+class Repository(object):
+    """In-memory repository backing `RepositoryUtils`"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.event_plugin_directories = {"Pyblish": EVENT_PLUGIN_DIRECTORY}
+        self.configs = {"Pyblish": {}}
+        self.jobs = {}
+        self.tasks = {}
+
+
+repository = Repository()
+
+
+class RepositoryUtils(object):
+
+    @staticmethod
+    def GetEventPluginDirectory(name):
+        return repository.event_plugin_directories.get(name, "")
+
+    @staticmethod
+    def GetEventPluginConfig(name):
+        return Config(repository.configs.setdefault(name, {}))
+
+    @staticmethod
+    def GetJob(job_id, invalidate=False):
+        return repository.jobs.get(job_id)
+
+    @staticmethod
+    def GetJobTasks(job, invalidate=False):
+        return list(repository.tasks.get(job.JobId, []))
+
+    @staticmethod
+    def SaveJob(job):
+        if job is not None:
+            repository.jobs[job.JobId] = job
+
+
+class DeadlineEventListener(object):
+    """Base class of event listeners
+
+    Callbacks are created on first access, like the events of the real
+    listener. Config entries are read from the "Pyblish" event plugin
+    config of `repository`, or the name given with `config_name`.
+    """
+
+    config_name = "Pyblish"
+
+    def __getattr__(self, name):
+        if not name.endswith("Callback"):
+            raise AttributeError(name)
+
+        callback = Callback()
+        setattr(self, name, callback)
+        return callback
+
+    def GetConfigEntry(self, key):
+        return repository.configs.setdefault(self.config_name, {})[key]
+
+    def GetConfigEntryWithDefault(self, key, default):
+        config = repository.configs.setdefault(self.config_name, {})
+        return config.get(key, default)
+
+    def LogInfo(self, message):
+        pass
+
+    def LogWarning(self, message):
+        pass
+
+
+class DeadlinePlugin(object):
+    """Stand-in for the plugin passed to pre and post task scripts"""
+
+    def __init__(self, job, task_id="0"):
+        self.job = job
+        self.task_id = task_id
+
+    def GetJob(self):
+        return self.job
+
+    def GetCurrentTaskId(self):
+        return self.task_id
+
+    def LogInfo(self, message):
+        pass
+
+    def LogWarning(self, message):
+        pass
+
+
+def install():
+    """Register the stand-in as the `Deadline` package in sys.modules"""
+
+    deadline = types.ModuleType("Deadline")
+    events = types.ModuleType("Deadline.Events")
+    scripting = types.ModuleType("Deadline.Scripting")
+
+    events.DeadlineEventListener = DeadlineEventListener
+    scripting.RepositoryUtils = RepositoryUtils
+
+    deadline.Events = events
+    deadline.Scripting = scripting
+
+    sys.modules["Deadline"] = deadline
+    sys.modules["Deadline.Events"] = events
+    sys.modules["Deadline.Scripting"] = scripting
+
+
+def uninstall():
+    for name in ("Deadline", "Deadline.Events", "Deadline.Scripting"):
+        sys.modules.pop(name, None)
+
+
+def _load_source(name, path):
+    try:
+        import importlib.util
+    except ImportError:
+        import imp
+        return imp.load_source(name, path)
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_event_plugin(path=None):
+    """Install the stand-in and import the event plugin at `path`"""
+
+    install()
+    path = path or os.path.join(EVENT_PLUGIN_DIRECTORY, "Pyblish.py")
+    return _load_source("Pyblish", path)
+
+
+def load_task_script(name, path=None):
+    """Install the stand-in and import the task script `name`
+
+    `name` is "OnPreTask" or "OnPostTask", loaded from the event plugin
+    directory unless a `path` is given.
+    """
+
+    install()
+    path = path or os.path.join(EVENT_PLUGIN_DIRECTORY, name + ".py")
+    return _load_source(name, path)
+
+
+def run_task_script(name, job, task_id="0", module=None):
+    """Run the task script `name` for task `task_id` of `job`
+
+    `module` is a task script loaded with `load_task_script`, loaded anew
+    when not given.
+    """
+
+    module = module or load_task_script(name)
+    return module.__main__(DeadlinePlugin(job, task_id))
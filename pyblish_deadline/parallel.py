@@ -0,0 +1,160 @@
+"""Publish with instances processed concurrently.
+
+Plug-ins are processed one order at a time, like `pyblish.util.publish`.
+Within an order, each instance is processed by its plug-ins in turn, while
+instances are processed concurrently on a bounded thread pool. Context
+plug-ins are processed on their own, in their place among the plug-ins of
+the order; the instance plug-ins before a context plug-in finish before it
+starts, and those after it wait for it. Collection is left serial, as
+collectors create the instances.
+
+Results are added to context.data["results"] in the order a serial publish
+would have produced them. Log records are captured per result by Pyblish
+through the root logger, so a result may include records of plug-ins that
+were running at the same time.
+"""
+
+from itertools import groupby
+from multiprocessing.pool import ThreadPool
+
+import logging
+
+import pyblish.api
+import pyblish.lib
+import pyblish.logic
+import pyblish.plugin
+
+
+def _tasks(plugins, context):
+    """Plug-in/instance pairs of `plugins`, in serial publish order"""
+
+    tasks = []
+    for plugin in plugins:
+        if not plugin.__instanceEnabled__:
+            tasks.append((plugin, None))
+            continue
+
+        for instance in pyblish.logic.instances_by_plugin(context, plugin):
+            if instance.data.get("publish") is False:
+                continue
+            tasks.append((plugin, instance))
+
+    return tasks
+
+
+def _segments(tasks):
+    """Split `tasks` into context tasks, and runs of instance tasks between
+
+    Each task is given its index in `tasks`, as (index, plugin, instance).
+    """
+
+    segments = []
+    for index, (plugin, instance) in enumerate(tasks):
+        if instance is None or not segments or segments[-1][0][2] is None:
+            segments.append([])
+        segments[-1].append((index, plugin, instance))
+
+    return segments
+
+
+def _process_lane(context, lane):
+    results = []
+    for index, plugin, instance in lane:
+        result = pyblish.plugin.process(plugin, context, instance)
+        results.append((index, result))
+
+    return results
+
+
+def publish(context=None, plugins=None, workers=4):
+    """Publish `context`, processing instances on up to `workers` threads
+
+    Arguments:
+        context (Context, optional): Context, defaults to a new context.
+        plugins (list, optional): Plug-ins to process, defaults to
+            `pyblish.api.discover()`.
+        workers (int): Number of instances processed at once.
+
+    Returns:
+        Context: The published context.
+
+    """
+
+    context = pyblish.api.Context() if context is None else context
+    plugins = pyblish.api.discover() if plugins is None else plugins
+    plugins = [p for p in plugins if p.active]
+
+    if hasattr(pyblish.logic, "plugins_by_targets"):
+        targets = ["default"] + pyblish.api.registered_targets()
+        plugins = pyblish.logic.plugins_by_targets(plugins, targets)
+
+    collectors = [p for p in plugins if pyblish.lib.inrange(
+        number=p.order,
+        base=pyblish.api.CollectorOrder)
+    ]
+
+    for plugin, instance in pyblish.logic.Iterator(collectors, context):
+        pyblish.plugin.process(plugin, context, instance)
+
+    plugins = [p for p in plugins if p not in collectors]
+    plugins.sort(key=lambda p: p.order)
+
+    context.data.setdefault("results", [])
+
+    test = pyblish.logic.registered_test()
+    state = {
+        "nextOrder": None,
+        "ordersWithError": set()
+    }
+
+    pool = ThreadPool(max(1, int(workers)))
+    try:
+        for order, group in groupby(plugins, key=lambda p: p.order):
+            state["nextOrder"] = order
+            message = test(**state)
+            if message:
+                pyblish.plugin.log.error("Stopped due to %s" % message)
+                break
+
+            for segment in _segments(_tasks(group, context)):
+                count = len(context.data["results"])
+
+                if segment[0][2] is None:
+                    results = _process_lane(context, segment)
+                else:
+                    # one lane per instance
+                    lanes = {}
+                    for task in segment:
+                        lanes.setdefault(id(task[2]), []).append(task)
+
+                    # Pyblish sets the root logger to DEBUG for each plug-in
+                    # and restores the level after. Overlapping plug-ins
+                    # restore each other's DEBUG, so the level is set and
+                    # restored once around them instead.
+                    root = logging.getLogger()
+                    level = root.level
+                    root.setLevel(logging.DEBUG)
+                    try:
+                        results = []
+                        for lane_results in pool.map(
+                                lambda lane: _process_lane(context, lane),
+                                list(lanes.values())):
+                            results.extend(lane_results)
+                    finally:
+                        root.setLevel(level)
+
+                    results.sort(key=lambda item: item[0])
+
+                results = [result for index, result in results]
+                context.data["results"][count:] = results
+
+                for result in results:
+                    if result["error"]:
+                        state["ordersWithError"].add(order)
+    finally:
+        pool.close()
+        pool.join()
+
+    pyblish.api.emit("published", context=context)
+
+    return context
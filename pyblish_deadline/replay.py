@@ -0,0 +1,264 @@
+"""Replay Deadline events through the event plugin, offline.
+
+Events are dictionaries with an "event" name, such as "OnJobFinished", and
+a "job" in job info form, as parsed by `infofile.load`. "OnJobError" events
+can carry a "task" id and "report", and slave events a "slave" name.
+"OnPreTask" and "OnPostTask" events run the task scripts, for the "task" id.
+
+Recorded events are read from json lines files, while `synthetic` generates
+events with Pyblish context data of a given size.
+"""
+
+import gc
+import sys
+import json
+import time
+import random
+import logging
+
+from pyblish_deadline import offline
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+log = logging.getLogger("pyblish_deadline")
+
+clock = getattr(time, "perf_counter", time.time)
+
+TASK_SCRIPTS = ("OnPreTask", "OnPostTask")
+
+
+def load_events(path):
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+
+    return events
+
+
+def synthetic(count, events=("OnJobFinished",), payload_size=1024, seed=0):
+    """Generate `count` events, with context data of about `payload_size`"""
+
+    rng = random.Random(seed)
+    result = []
+    for index in range(count):
+        data = {"user": "farm", "index": index,
+                "padding": "x" * max(0, payload_size - 40)}
+        instance_data = {"name": "Write1", "family": "render",
+                         "families": ["deadline"]}
+        result.append({
+            "event": rng.choice(events),
+            "job": {
+                "Name": "synthetic.%04d" % index,
+                "UserName": "farm",
+                "Plugin": "Nuke",
+                "Frames": "1-100",
+                "ExtraInfoKeyValue": {
+                    "PyblishContextData": json.dumps(data),
+                    "PyblishInstanceData": json.dumps(instance_data)
+                }
+            }
+        })
+
+    return result
+
+
+def dispatch(listener, event, task_scripts=None):
+    """Send `event` to `listener`, or the task script it names
+
+    `task_scripts` caches the task scripts loaded, by name.
+    """
+
+    name = event["event"]
+    job = offline.Job.from_info(event.get("job", {}))
+
+    if name in TASK_SCRIPTS:
+        if task_scripts is None:
+            task_scripts = {}
+        if name not in task_scripts:
+            task_scripts[name] = offline.load_task_script(name)
+        return offline.run_task_script(name, job, event.get("task", "0"),
+                                       task_scripts[name])
+    if name == "OnHouseCleaning":
+        return listener.OnHouseCleaning()
+    if name == "OnJobError":
+        task = offline.Task(event.get("task", "0"))
+        return listener.OnJobError(job, task, event.get("report", ""))
+    if name in ("OnSlaveRendering", "OnSlaveStartingJob"):
+        return getattr(listener, name)(event.get("slave", "slave"), job)
+
+    return getattr(listener, name)(job)
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    index = int(round(percent / 100.0 * (len(values) - 1)))
+    return values[index]
+
+
+def _rss():
+    """Return the resident memory of the process in bytes"""
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+
+    # current resident size, where /proc is available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+
+    # peak resident size, in bytes on macOS and kilobytes elsewhere
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _traced():
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _unconfigured(events):
+    """Return the names of `events` without Pyblish plugin paths"""
+
+    config = offline.repository.configs.get("Pyblish", {})
+    names = set(event["event"] for event in events)
+    return sorted(name for name in names
+                  if not config.get(name + "Paths", "").strip())
+
+
+def _pass(listener, events, rate, duration, samples, memory):
+    """Replay `events` once, sampling memory with the `memory` callable"""
+
+    task_scripts = {}
+
+    gc.collect()
+    memory_samples = [memory()]
+
+    latencies = []
+    errors = 0
+    start = clock()
+    total = len(events) if duration is None else None
+    sample_every = max(1, len(events) // max(1, samples))
+
+    index = 0
+    while True:
+        elapsed = clock() - start
+        if total is not None and index >= total:
+            break
+        if duration is not None and elapsed >= duration:
+            break
+
+        if rate:
+            delay = start + index / float(rate) - clock()
+            if delay > 0:
+                time.sleep(delay)
+
+        event = events[index % len(events)]
+        event_start = clock()
+        try:
+            dispatch(listener, event, task_scripts)
+        except Exception:
+            errors += 1
+        latencies.append(clock() - event_start)
+
+        index += 1
+        if index % sample_every == 0:
+            memory_samples.append(memory())
+
+    elapsed = clock() - start
+    gc.collect()
+    memory_samples.append(memory())
+
+    return index, errors, elapsed, latencies, memory_samples
+
+
+def _memory_report(samples):
+    return {
+        "start": samples[0],
+        "end": samples[-1],
+        "growth": samples[-1] - samples[0],
+        "samples": samples
+    }
+
+
+def replay(events, rate=None, duration=None, listener=None,
+           samples=10, trace_memory=False):
+    """Feed `events` through the event listener and report on it
+
+    Memory is sampled as the resident size of the process. With
+    `trace_memory`, the events are replayed a second time under tracemalloc,
+    which slows allocations down too much to time the first pass with.
+
+    Arguments:
+        events (list): Events to replay, repeated until `duration` is up.
+        rate (float): Events per second to aim for, unlimited by default.
+        duration (float): Seconds to replay for, one pass by default.
+        listener: Listener to replay through, defaults to the event plugin
+            loaded with `offline.load_event_plugin`.
+        samples (int): Number of memory samples taken over the run.
+        trace_memory (bool): Also report memory allocated by Python.
+
+    """
+
+    if not events:
+        raise ValueError("No events to replay.")
+
+    if listener is None:
+        listener = offline.load_event_plugin().GetDeadlineEventListener()
+
+    # events without plugin paths return before publishing anything
+    unconfigured = _unconfigured(events)
+    if unconfigured:
+        log.warning("No plugin paths configured for %s; these events only "
+                    "measure the early return of the event plugin."
+                    % ", ".join(unconfigured))
+
+    index, errors, elapsed, latencies, memory = _pass(
+        listener, events, rate, duration, samples, _rss
+    )
+
+    traced = None
+    if trace_memory and tracemalloc:
+        tracing = not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        try:
+            traced = _pass(listener, events, rate, duration, samples,
+                           _traced)[-1]
+        finally:
+            if tracing:
+                tracemalloc.stop()
+
+    listener.Cleanup()
+
+    report = {
+        "events": index,
+        "errors": errors,
+        "seconds": elapsed,
+        "events_per_second": index / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000.0,
+            "p90": percentile(latencies, 90) * 1000.0,
+            "p99": percentile(latencies, 99) * 1000.0,
+            "max": max(latencies or [0.0]) * 1000.0
+        },
+        "memory_bytes": _memory_report(memory),
+        "unconfigured_events": unconfigured
+    }
+
+    if traced is not None:
+        report["traced_memory_bytes"] = _memory_report(traced)
+
+    return report
@@ -0,0 +1,416 @@
+"""Context-free Deadline submission.
+
+Jobs are `deadlineData` shaped dictionaries; with a `job` and `plugin`
+dictionary, and optionally `auxiliaryFiles` and `order`. Jobs with an order
+depend on all jobs of the previous order, jobs without an order are submitted
+last without dependencies.
+
+Jobs can also carry a `family` and a scene `complexity` key, which identify
+similar jobs when choosing a ChunkSize from render history.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import tempfile
+import subprocess
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+
+from pyblish_deadline import infofile
+
+
+log = logging.getLogger("pyblish_deadline")
+
+
+def call_deadline_command(arguments, hideWindow=True):
+    # On OSX, we look for the DEADLINE_PATH file. On other platforms,
+    # we use the environment variable.
+    if os.path.exists("/Users/Shared/Thinkbox/DEADLINE_PATH"):
+        with open("/Users/Shared/Thinkbox/DEADLINE_PATH") as f:
+            deadlineBin = f.read().strip()
+            deadlineCommand = deadlineBin + "/deadlinecommand"
+    else:
+        deadlineBin = os.environ["DEADLINE_PATH"]
+        if os.name == "nt":
+            deadlineCommand = deadlineBin + "\\deadlinecommand.exe"
+        else:
+            deadlineCommand = deadlineBin + "/deadlinecommand"
+
+    startupinfo = None
+    if hideWindow and os.name == "nt" and hasattr(subprocess,
+                                                  "STARTF_USESHOWWINDOW"):
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+
+    environment = {}
+    for key in os.environ.keys():
+        environment[key] = str(os.environ[key])
+
+    # Need to set the PATH, cuz windows seems to load DLLs from the PATH
+    # earlier that cwd....
+    if os.name == "nt":
+        path = str(deadlineBin + os.pathsep + os.environ["PATH"])
+        environment["PATH"] = path
+
+    arguments = [deadlineCommand] + list(arguments)
+
+    # Specifying PIPE for all handles to
+    # workaround a Python bug on Windows.
+    # The unused handles are then closed immediatley afterwards.
+    proc = subprocess.Popen(arguments, cwd=deadlineBin,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE,
+                            startupinfo=startupinfo,
+                            env=environment)
+    proc.stdin.close()
+    proc.stderr.close()
+
+    output = proc.stdout.read()
+    proc.wait()
+
+    if not isinstance(output, str):
+        output = output.decode("utf-8", "replace")
+
+    return output
+
+
+def serialize_data(data, label="data", log=log):
+    """Return `data` as json, skipping values that can not be serialized"""
+
+    result = {}
+    for key in data:
+        try:
+            json.dumps(data[key])
+            result[key] = data[key]
+        except:
+            msg = "\"{0}\"".format(data[key])
+            msg += " in {0}[\"{1}\"]".format(label, key)
+            msg += " could not be serialized."
+            log.warning(msg)
+
+    return json.dumps(result)
+
+
+def sort_jobs(jobs):
+    """Group `jobs` by order
+
+    Returns a list of (order, jobs) tuples in submission order. Jobs without
+    an order are grouped last with an order of None.
+    """
+
+    jobs_by_order = defaultdict(list)
+    jobs_no_order = []
+
+    for job in jobs:
+        if "order" in job:
+            jobs_by_order[job["order"]].append(job)
+        else:
+            jobs_no_order.append(job)
+
+    groups = [(order, jobs_by_order[order]) for order in sorted(jobs_by_order)]
+    if jobs_no_order:
+        groups.append((None, jobs_no_order))
+
+    return groups
+
+
+class SubmissionError(ValueError):
+    """Raised when some of the jobs could not be submitted
+
+    `job_ids` holds the ids of the jobs that were submitted, aligned with
+    the jobs given, and None for jobs that were not.
+    """
+
+    def __init__(self, message, job_ids):
+        super(SubmissionError, self).__init__(message)
+        self.job_ids = job_ids
+
+
+class Submitter(object):
+    """Submit jobs to Deadline
+
+    Arguments:
+        command (callable): Runs deadlinecommand with a list of arguments
+            and returns its output.
+        workers (int): Number of concurrent deadlinecommand calls, per order.
+        batch_size (int): Number of jobs submitted per deadlinecommand call.
+        log (logging.Logger): Logger to report to.
+        optimizer (chunking.ChunkOptimizer, optional): Sets the ChunkSize
+            of jobs before submission.
+
+    """
+
+    def __init__(self, command=call_deadline_command, workers=1,
+                 batch_size=1, log=log, optimizer=None):
+        self.command = command
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.log = log
+        self.optimizer = optimizer
+
+    def submit(self, jobs):
+        """Submit `jobs` and return their job ids, in the order given
+
+        Submission stops after the first order with a failed batch, as the
+        jobs of later orders would depend on it. SubmissionError is raised
+        with the ids of the jobs submitted so far.
+        """
+
+        job_ids = {}
+        dependencies = []
+        errors = []
+
+        pool = ThreadPool(self.workers) if self.workers > 1 else None
+        try:
+            for order, group in sort_jobs(jobs):
+                batches = [group[i:i + self.batch_size]
+                           for i in range(0, len(group), self.batch_size)]
+
+                def submit_batch(batch):
+                    try:
+                        return self.submit_batch(batch, dependencies), None
+                    except Exception as error:
+                        return None, error
+
+                if pool:
+                    results = pool.map(submit_batch, batches)
+                else:
+                    results = [submit_batch(batch) for batch in batches]
+
+                group_ids = []
+                for batch, (batch_ids, error) in zip(batches, results):
+                    if error is not None:
+                        errors.append(error)
+                        continue
+                    for job, job_id in zip(batch, batch_ids):
+                        job_ids[id(job)] = job_id
+                    group_ids.extend(batch_ids)
+
+                if errors:
+                    break
+
+                if order is not None:
+                    dependencies = group_ids
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        result = [job_ids.get(id(job)) for job in jobs]
+        if errors:
+            msg = "%s of %s jobs submitted, " % (len(job_ids), len(jobs))
+            msg += "before failing with:\n\n"
+            msg += "\n\n".join(str(error) for error in errors)
+            raise SubmissionError(msg, result)
+
+        return result
+
+    def submit_batch(self, jobs, dependencies=()):
+        """Submit `jobs` in a single deadlinecommand call"""
+
+        paths = []
+        args = []
+        try:
+            for job in jobs:
+                job_args = self.write_job(job, dependencies)
+                paths.extend(job_args[:2])
+
+                if len(jobs) > 1:
+                    args.append("-job")
+                args.extend(job_args)
+
+            if len(jobs) > 1:
+                args.insert(0, "-SubmitMultipleJobs")
+
+            result = self.command(args)
+            self.log.info(result)
+        finally:
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+        job_ids = re.findall(r"JobID=(.*)", result)
+        job_ids = [job_id.strip() for job_id in job_ids]
+        if len(job_ids) != len(jobs):
+            msg = "Expected %s job ids from Deadline, " % len(jobs)
+            msg += "got %s:\n\n%s" % (len(job_ids), result)
+            raise ValueError(msg)
+
+        return job_ids
+
+    def write_job(self, job, dependencies=()):
+        """Write the job and plugin info files of `job`
+
+        Returns the deadlinecommand arguments to submit the job with.
+        """
+
+        submission_id = uuid.uuid4()
+        current_dir = tempfile.gettempdir()
+
+        if self.optimizer:
+            job = self.optimizer.optimize(job)
+
+        # keys identifying similar jobs in the render history
+        job_data = job["job"]
+        history_keys = [(key, job[name])
+                        for key, name in (("PyblishFamily", "family"),
+                                          ("PyblishComplexity", "complexity"))
+                        if job.get(name)]
+        if history_keys:
+            job_data = dict(job_data)
+            job_data["ExtraInfoKeyValue"] = dict(
+                job_data.get("ExtraInfoKeyValue", {}), **dict(history_keys)
+            )
+
+        # writing job data
+        if "order" not in job:
+            dependencies = ()
+        data = infofile.dumps_job(job_data, dependencies)
+
+        filename = str(submission_id) + ".job.txt"
+        job_path = os.path.join(current_dir, filename)
+
+        with open(job_path, "w") as outfile:
+            outfile.write(data)
+
+        self.log.info("job data:\n\n%s" % data)
+
+        # writing plugin data
+        data = infofile.dumps_plugin(job["plugin"])
+
+        filename = str(submission_id) + ".plugin.txt"
+        plugin_path = os.path.join(current_dir, filename)
+
+        with open(plugin_path, "w") as outfile:
+            outfile.write(data)
+
+        self.log.info("plugin data:\n\n%s" % data)
+
+        args = [job_path, plugin_path]
+
+        if "auxiliaryFiles" in job:
+            aux_files = job["auxiliaryFiles"]
+            if isinstance(aux_files, list):
+                args.extend(aux_files)
+            else:
+                args.append(aux_files)
+
+        return args
+
+
+def submit(jobs, **kwargs):
+    """Submit `jobs` and return their job ids
+
+    Keyword arguments are passed on to `Submitter`. Raises SubmissionError,
+    carrying the ids of the jobs submitted so far, when not all jobs could
+    be submitted.
+    """
+
+    return Submitter(**kwargs).submit(jobs)
+
+
+# jobs no longer reported by Deadline, such as deleted or archived jobs
+MISSING_STATE = "Missing"
+
+FINISHED_STATES = ("Completed", "Failed", MISSING_STATE)
+FAILED_STATES = ("Failed", MISSING_STATE)
+
+
+class WaitTimeout(RuntimeError):
+    """Raised when jobs have not finished in time
+
+    `states` holds the last known state of each job.
+    """
+
+    def __init__(self, message, states):
+        super(WaitTimeout, self).__init__(message)
+        self.states = states
+
+
+def get_job_states(job_ids, command=call_deadline_command):
+    """Return the status of each of `job_ids`, with a single query
+
+    Jobs Deadline does not report on are left out.
+    """
+
+    if not job_ids:
+        return {}
+
+    output = command(["-GetJob", ",".join(job_ids), "false"])
+
+    states = {}
+    for block in re.split(r"\r?\n\s*\r?\n", output):
+        info = infofile.loads(block)
+        if "Status" not in info:
+            continue
+
+        job_id = info.get("ID") or info.get("JobId") or info.get("Id")
+        if job_id is None and len(job_ids) == 1:
+            job_id = job_ids[0]
+        if job_id is None:
+            continue
+
+        states[job_id.strip()] = info["Status"].strip()
+
+    return states
+
+
+def wait_for_jobs(job_ids, command=call_deadline_command, timeout=3600,
+                  interval=5, max_interval=60, backoff=1.5, callback=None,
+                  sleep=time.sleep, clock=time.time):
+    """Block until all of `job_ids` are completed or failed
+
+    Every poll queries the status of all unfinished jobs at once. The poll
+    interval grows by `backoff` up to `max_interval` while nothing changes,
+    and resets to `interval` on progress. Jobs left out of a response, once
+    Deadline reports on any of the jobs polled, are marked `MISSING_STATE`
+    and count as failed. `callback` is called with the states of all jobs
+    after each poll.
+
+    Returns the final state of each job. Raises WaitTimeout, carrying the
+    last known states, if the jobs are not finished within `timeout` seconds.
+    """
+
+    states = dict((job_id, "Unknown") for job_id in job_ids)
+    start = clock()
+    delay = interval
+
+    while True:
+        pending = [job_id for job_id in job_ids
+                   if states[job_id] not in FINISHED_STATES]
+
+        changed = False
+        reported = get_job_states(pending, command)
+        for job_id, state in reported.items():
+            if job_id in states and states[job_id] != state:
+                states[job_id] = state
+                changed = True
+
+        # an empty response is more likely a failed query than deleted jobs
+        if reported:
+            for job_id in pending:
+                if job_id not in reported:
+                    states[job_id] = MISSING_STATE
+                    changed = True
+
+        if callback:
+            callback(dict(states))
+
+        pending = [job_id for job_id in job_ids
+                   if states[job_id] not in FINISHED_STATES]
+        if not pending:
+            return states
+
+        elapsed = clock() - start
+        if elapsed >= timeout:
+            msg = "Timed out after %ss waiting for jobs: " % int(elapsed)
+            msg += ", ".join("%s (%s)" % (job_id, states[job_id])
+                             for job_id in pending)
+            raise WaitTimeout(msg, states)
+
+        delay = interval if changed else min(delay * backoff, max_interval)
+        sleep(min(delay, timeout - elapsed))
@@ -38,4 +38,9 @@ setup(
     install_requires=[
         "pyblish-base>=1.4"
     ],
+    entry_points={
+        "console_scripts": [
+            "pyblish-deadline = pyblish_deadline.cli:main"
+        ]
+    },
 )
@@ -0,0 +1,145 @@
+import sqlite3
+
+import pytest
+
+from pyblish_deadline import chunking, offline
+
+
+@pytest.mark.parametrize("frames, count", [
+    ("1", 1),
+    ("1-100", 100),
+    ("1-100x2", 50),
+    ("1-10, 20-29", 20),
+    ("10-1", 10),
+    ("-5--1", 5),
+    ("1-9step4", 3),
+    ("", 0),
+])
+def test_frame_count(frames, count):
+    assert chunking.frame_count(frames) == count
+
+
+def test_frame_count_invalid():
+    with pytest.raises(ValueError):
+        chunking.frame_count("1-a")
+
+
+class TimeSpan(object):
+    TotalSeconds = 90.5
+
+
+@pytest.mark.parametrize("render_time, seconds", [
+    (12.5, 12.5),
+    ("01:02:03", 3723),
+    ("1.00:00:10", 86410),
+    (TimeSpan(), 90.5),
+])
+def test_task_seconds(render_time, seconds):
+    task = offline.Task(render_time=render_time)
+    assert chunking.task_seconds(task) == seconds
+
+
+def test_fit_separates_startup_and_frames():
+    samples = [(frames, 20 + 3 * frames) for frames in (1, 5, 10, 20)]
+    startup, per_frame = chunking.fit(samples)
+
+    assert startup == pytest.approx(20)
+    assert per_frame == pytest.approx(3)
+
+
+def test_fit_same_frames_uses_default_startup():
+    assert chunking.fit([(10, 100), (10, 100)], 30) == (30, 7)
+
+    # capped at half of the task time
+    assert chunking.fit([(10, 40)], 30) == (20, 2)
+
+
+def test_best_chunk_size():
+    # startup dominates, so every worker gets a single task
+    assert chunking.best_chunk_size(100, 60, 1, 10) == 10
+
+    # no startup, so the chunk size does not matter beyond filling workers
+    assert chunking.best_chunk_size(100, 0, 1, 100) == 1
+
+    assert chunking.best_chunk_size(100, 60, 1, 10, max_chunk_size=5) == 5
+    assert chunking.best_chunk_size(3, 60, 1, 10) == 1
+
+
+def history(tmpdir, samples, family="render", complexity="heavy"):
+    result = chunking.History(str(tmpdir.join("history.db")))
+    result.record("Nuke", family, complexity, samples)
+    return result
+
+
+def render_job(**kwargs):
+    job = {"job": {"Name": "shot010", "Plugin": "Nuke", "Frames": "1-100",
+                   "ChunkSize": 1},
+           "plugin": {}, "family": "render", "complexity": "heavy"}
+    job.update(kwargs)
+    return job
+
+
+def test_optimize(tmpdir):
+    samples = [(frames, 60 + frames) for frames in (1, 2, 5, 10, 20)]
+    optimizer = chunking.ChunkOptimizer(history(tmpdir, samples), workers=10)
+
+    job = render_job()
+    optimized = optimizer.optimize(job)
+
+    assert optimized["job"]["ChunkSize"] == 10
+    assert job["job"]["ChunkSize"] == 1
+
+
+def test_optimize_widens_search(tmpdir):
+    samples = [(frames, 60 + frames) for frames in (1, 2, 5, 10, 20)]
+    optimizer = chunking.ChunkOptimizer(
+        history(tmpdir, samples, complexity="light"), workers=10
+    )
+
+    assert optimizer.optimize(render_job())["job"]["ChunkSize"] == 10
+
+
+def test_optimize_without_enough_history(tmpdir):
+    optimizer = chunking.ChunkOptimizer(history(tmpdir, [(1, 60)]))
+
+    job = render_job()
+    assert optimizer.optimize(job) is job
+
+
+class LockedHistory(object):
+
+    def samples(self, *args):
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_optimize_keeps_chunk_size_on_database_errors():
+    job = render_job()
+    assert chunking.ChunkOptimizer(LockedHistory()).optimize(job) is job
+
+
+def test_from_environment(tmpdir, monkeypatch):
+    monkeypatch.delenv("PYBLISH_DEADLINE_HISTORY", raising=False)
+    assert chunking.from_environment() is None
+
+    monkeypatch.setenv("PYBLISH_DEADLINE_HISTORY",
+                       str(tmpdir.join("history.db")))
+    monkeypatch.setenv("PYBLISH_DEADLINE_FARM_WORKERS", "20")
+    assert chunking.from_environment().workers == 20
+
+    # a directory can not be opened as a database
+    monkeypatch.setenv("PYBLISH_DEADLINE_HISTORY", str(tmpdir))
+    assert chunking.from_environment() is None
+
+
+def test_record_job(tmpdir):
+    result = history(tmpdir, [])
+    job = offline.Job(plugin="Nuke", extra_info={"PyblishFamily": "render"})
+    tasks = [offline.Task("0", [1, 2], "Completed", "00:01:00"),
+             offline.Task("1", [3, 4], "Failed", "00:02:00"),
+             offline.Task("2", [5], "Completed", "invalid"),
+             offline.Task("3", [6], "Completed", 30.0)]
+
+    result.record_job(job, tasks)
+
+    assert sorted(result.samples("Nuke", "render", "")) == [(1, 30.0),
+                                                          (2, 60.0)]
@@ -0,0 +1,77 @@
+import json
+
+from pyblish_deadline import infofile
+
+
+def test_values_are_written_as_they_are():
+    context_data = json.dumps({"comment": "line1\nline2",
+                               "path": "C:\\new\\nuke"})
+    text = infofile.dumps_job({
+        "OutputFilename0": "N:\\nuke\\shot.####.exr",
+        "Comment": "a=b=c",
+        "ExtraInfo": ["C:\\new"],
+        "ExtraInfoKeyValue": {"PyblishContextData": context_data},
+        "EnvironmentKeyValue": {"PATH": "\\\\server\\nuke;C:\\bin"},
+    })
+
+    assert text.splitlines() == [
+        "OutputFilename0=N:\\nuke\\shot.####.exr",
+        "Comment=a=b=c",
+        "ExtraInfo0=C:\\new",
+        "ExtraInfoKeyValue0=PyblishContextData=" + context_data,
+        "EnvironmentKeyValue0=PATH=\\\\server\\nuke;C:\\bin",
+    ]
+
+    # read on the farm through the Deadline API, without infofile.load
+    value = text.splitlines()[3].split("=", 2)[2]
+    assert json.loads(value) == {"comment": "line1\nline2",
+                                 "path": "C:\\new\\nuke"}
+
+
+def test_plugin_values_are_written_as_they_are():
+    text = infofile.dumps_plugin({"SceneFile": "N:\\nuke\\shot.nk",
+                                  "Share": "\\\\server\\shots"})
+    assert text == ("SceneFile=N:\\nuke\\shot.nk\n"
+                    "Share=\\\\server\\shots\n")
+
+
+def test_newlines_are_replaced():
+    text = infofile.dumps_plugin({"Comment": "one\ntwo\r\nthree\rfour"})
+    assert text == "Comment=one\\ntwo\\nthree\\nfour\n"
+
+    # the replacement is lossy, and not undone
+    assert infofile.loads(text) == {"Comment": "one\\ntwo\\nthree\\nfour"}
+
+
+def test_roundtrip_values():
+    job_data = {
+        "Name": "shot010",
+        "OutputFilename0": "C:\\new\\file.####.exr",
+        "Comment": "a=b=c",
+        "Path": "\\\\server\\share\\nuke\\",
+        "ExtraInfo": ["fx", "fx", "C:\\new", ""],
+        "ExtraInfoKeyValue": {"PyblishContextData": '{"path": "C:\\\\new"}',
+                              "Equation": "x=1"},
+        "EnvironmentKeyValue": {"PATH": "C:\\bin;D:\\nuke"},
+    }
+
+    data = infofile.loads(infofile.dumps_job(job_data))
+
+    assert data == job_data
+
+
+def test_dependencies():
+    text = infofile.dumps_job({"Name": "a"}, dependencies=["id1", "id2"])
+    data = infofile.loads(text)
+
+    assert data["JobDependency0"] == "id1"
+    assert data["JobDependency1"] == "id2"
+
+
+def test_invalid_key():
+    try:
+        infofile.dumps_plugin({"a=b": 1})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Expected a ValueError")
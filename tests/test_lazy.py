@@ -0,0 +1,97 @@
+import copy
+import json
+import pickle
+
+import pyblish.api
+
+from pyblish_deadline import lazy, offline
+
+
+def job(data):
+    return offline.Job(name="shot010 - Write1", extra_info={
+        "PyblishInstanceData": json.dumps(data)
+    })
+
+
+def test_data_is_decoded_on_first_use():
+    context = pyblish.api.Context()
+    instance = lazy.create_instance(context, job({"name": "Write1",
+                                                  "family": "render",
+                                                  "frames": [1, 2]}))
+
+    assert list(context) == [instance]
+    assert not instance.data.loaded
+
+    assert instance.data["family"] == "render"
+    assert instance.data.loaded
+    assert instance.data("frames") == [1, 2]
+    assert instance.data["deadlineRehydrated"] is True
+
+
+def test_names_are_consistent():
+    context = pyblish.api.Context()
+    instance = lazy.create_instance(context, job({"name": "Write1"}))
+
+    assert instance.name == "shot010 - Write1"
+    assert instance.data["name"] == instance.name
+    assert instance.data["deadlineInstanceName"] == "Write1"
+
+
+def test_without_instance_data():
+    context = pyblish.api.Context()
+    assert lazy.create_instance(context, offline.Job(name="shot010")) is None
+    assert lazy.create_instance(context, None) is None
+    assert list(context) == []
+
+
+class Instance(object):
+    """Instance keeping its data elsewhere than `_data`"""
+
+    def __init__(self, name):
+        self.name = name
+        self.data = {"name": name, "family": "default"}
+
+
+class Context(list):
+
+    def create_instance(self, name):
+        instance = Instance(name)
+        self.append(instance)
+        return instance
+
+
+def test_data_is_decoded_without_private_data():
+    instance = lazy.create_instance(Context(), job({"name": "Write1",
+                                                    "family": "render"}))
+
+    assert instance.data == {"name": "shot010 - Write1",
+                             "deadlineInstanceName": "Write1",
+                             "family": "render",
+                             "deadlineRehydrated": True}
+
+
+def test_deepcopy():
+    context = pyblish.api.Context()
+    instance = lazy.create_instance(context, job({"name": "Write1",
+                                                  "frames": [1, 2]}))
+
+    data = copy.deepcopy(instance.data)
+
+    assert instance.data.loaded
+    assert type(data) is type(pyblish.api.Context().data)
+    assert data == dict(instance.data)
+    assert data("frames") == [1, 2]
+    assert data["frames"] is not instance.data["frames"]
+
+    # copying the whole instance
+    copied = copy.deepcopy(instance)
+    assert copied.data == dict(instance.data)
+    assert copied.data._parent is copied
+
+
+def test_copy_and_pickle():
+    context = pyblish.api.Context()
+    instance = lazy.create_instance(context, job({"family": "render"}))
+
+    assert copy.copy(instance.data)["family"] == "render"
+    assert pickle.loads(pickle.dumps(instance.data))["family"] == "render"
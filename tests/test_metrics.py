@@ -0,0 +1,120 @@
+import socket
+
+from pyblish_deadline import metrics, offline
+
+
+def read_samples(path):
+    samples = {}
+    for line in path.readlines(cr=False):
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = float(value)
+    return samples
+
+
+def test_textfile_merges_into_existing_file(tmpdir):
+    path = tmpdir.join("pyblish.prom")
+
+    for duration in (0.3, 2.0):
+        sink = metrics.PrometheusTextfileSink(str(path))
+        recorder = metrics.Metrics(sink)
+        recorder.increment("events", {"event": "OnJobFinished"})
+        recorder.observe("event_duration_seconds", duration,
+                         {"event": "OnJobFinished"}, buckets=(0.5, 1))
+        recorder.flush()
+
+    samples = read_samples(path)
+    name = "pyblish_deadline_event_duration_seconds"
+    labels = 'event="OnJobFinished"'
+
+    assert samples['pyblish_deadline_events_total{%s}' % labels] == 2
+    assert samples['%s_bucket{%s,le="0.5"}' % (name, labels)] == 1
+    assert samples['%s_bucket{%s,le="1"}' % (name, labels)] == 1
+    assert samples['%s_bucket{%s,le="+Inf"}' % (name, labels)] == 2
+    assert samples['%s_sum{%s}' % (name, labels)] == 2.3
+    assert samples['%s_count{%s}' % (name, labels)] == 2
+
+    text = path.read()
+    assert "# TYPE pyblish_deadline_events_total counter" in text
+    assert "# TYPE %s histogram" % name in text
+
+
+def test_textfile_keeps_exact_bucket_bounds(tmpdir):
+    path = tmpdir.join("pyblish.prom")
+
+    sink = metrics.PrometheusTextfileSink(str(path))
+    sink.observe("payload_bytes", 10, (), metrics.SIZE_BUCKETS)
+    sink.flush()
+
+    assert 'payload_bytes_bucket{le="1048576"} 1' in path.read()
+
+
+def test_textfile_drops_malformed_lines(tmpdir):
+    path = tmpdir.join("pyblish.prom")
+    path.write("# TYPE pyblish_deadline_events_total counter\n"
+               "pyblish_deadline_events_total 3.0\n"
+               "pyblish_deadline_events_total not-a-number\n"
+               "garbage\n")
+
+    sink = metrics.PrometheusTextfileSink(str(path))
+    sink.increment("pyblish_deadline_events", 1, ())
+    sink.flush()
+
+    assert path.read() == ("# TYPE pyblish_deadline_events_total counter\n"
+                           "pyblish_deadline_events_total 4.0\n")
+
+
+class Socket(object):
+
+    packets = []
+
+    def __init__(self, *args):
+        pass
+
+    def sendto(self, data, address):
+        self.packets.append((data.decode("utf-8"), address))
+
+    def close(self):
+        pass
+
+
+def test_statsd_splits_packets(monkeypatch):
+    monkeypatch.setattr(socket, "socket", Socket)
+    monkeypatch.setattr(Socket, "packets", [])
+
+    sink = metrics.StatsdSink("farm", 9125)
+    sink.max_packet_size = 40
+    for index in range(5):
+        sink.increment("events", 1, (("event", "OnJobFinished"),))
+    sink.observe("duration_seconds", 0.5, (), ())
+    sink.flush()
+
+    lines = []
+    for packet, address in Socket.packets:
+        assert address == ("farm", 9125)
+        assert len(packet) <= 40
+        lines.extend(packet.split("\n"))
+
+    assert len(Socket.packets) > 1
+    assert lines == ["events.OnJobFinished:1|c"] * 5 + [
+        "duration_seconds:500|ms"
+    ]
+
+
+def test_from_config():
+    def sink(entries):
+        return metrics.from_config(offline.Config(entries)).sink
+
+    assert isinstance(sink({}), metrics.NullSink)
+    assert isinstance(sink({"MetricsSink": "Prometheus"}), metrics.NullSink)
+    assert isinstance(sink({"MetricsSink": "StatsD",
+                            "MetricsStatsdAddress": "localhost:abc"}),
+                      metrics.NullSink)
+
+    statsd = sink({"MetricsSink": "StatsD",
+                   "MetricsStatsdAddress": "localhost:9125"})
+    assert statsd.address == ("localhost", 9125)
+
+    textfile = sink({"MetricsSink": "Prometheus",
+                     "MetricsTextfilePath": "/tmp/pyblish.prom"})
+    assert textfile.path == "/tmp/pyblish.prom"
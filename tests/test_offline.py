@@ -0,0 +1,163 @@
+import os
+import json
+
+import pytest
+
+from pyblish_deadline import chunking, offline, replay
+
+
+PLUGIN = '''
+import json
+import pyblish.api
+
+
+class RecordEvent(pyblish.api.ContextPlugin):
+    order = pyblish.api.IntegratorOrder
+
+    def process(self, context):
+        with open(context.data["output"], "a") as f:
+            f.write(json.dumps({
+                "event": context.data["deadlineEvent"],
+                "job": context.data["deadlineJob"].JobName,
+                "instances": [str(instance) for instance in context]
+            }) + "\\n")
+'''
+
+
+@pytest.fixture
+def plugins(tmpdir, monkeypatch):
+    monkeypatch.setenv("PYBLISHPLUGINPATH", "")
+    tmpdir.join("record_event.py").write(PLUGIN)
+    yield str(tmpdir)
+    offline.repository.reset()
+    offline.uninstall()
+
+
+def job(tmpdir, name="shot010"):
+    output = str(tmpdir.join("output.jsonl"))
+    info = {"Name": name,
+            "ExtraInfoKeyValue": {
+                "PyblishContextData": json.dumps({"output": output}),
+                "PyblishInstanceData": json.dumps({"family": "render"})
+            }}
+    return offline.Job.from_info(info)
+
+
+def published(tmpdir):
+    path = tmpdir.join("output.jsonl")
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.readlines()]
+
+
+def test_event_plugin(plugins, tmpdir):
+    offline.repository.configs["Pyblish"]["OnJobFinishedPaths"] = plugins
+
+    listener = offline.load_event_plugin().GetDeadlineEventListener()
+    listener.OnJobFinished(job(tmpdir))
+    listener.OnJobStarted(job(tmpdir))
+    listener.Cleanup()
+
+    assert published(tmpdir) == [{"event": "OnJobFinished",
+                                  "job": "shot010",
+                                  "instances": ["shot010"]}]
+
+
+@pytest.mark.parametrize("name", ["OnPreTask", "OnPostTask"])
+def test_task_script(plugins, tmpdir, name):
+    offline.repository.configs["Pyblish"][name + "Paths"] = plugins
+
+    offline.run_task_script(name, job(tmpdir))
+
+    assert published(tmpdir) == [{"event": name,
+                                  "job": "shot010",
+                                  "instances": ["shot010"]}]
+
+
+def test_task_script_without_paths(plugins, tmpdir):
+    offline.run_task_script("OnPreTask", job(tmpdir))
+    assert published(tmpdir) == []
+
+
+def test_job_submitted_adds_task_scripts(plugins, tmpdir):
+    config = offline.repository.configs["Pyblish"]
+    config["OnPreTaskPaths"] = plugins
+
+    submitted = job(tmpdir)
+    listener = offline.load_event_plugin().GetDeadlineEventListener()
+    listener.OnJobSubmitted(submitted)
+    listener.Cleanup()
+
+    assert os.path.basename(submitted.JobPreTaskScript) == "OnPreTask.py"
+    assert submitted.JobPostTaskScript == ""
+    assert offline.repository.jobs[submitted.JobId] is submitted
+
+
+def test_job_from_file(tmpdir):
+    path = tmpdir.join("job.txt")
+    path.write("Name=shot010\n"
+               "Plugin=Nuke\n"
+               "ExtraInfo0=fx\n"
+               "ExtraInfoKeyValue0=PyblishFamily=render\n"
+               "EnvironmentKeyValue0=PYTHONPATH=/tools\n")
+
+    loaded = offline.Job.from_file(str(path))
+
+    assert loaded.JobName == "shot010"
+    assert loaded.JobPlugin == "Nuke"
+    assert loaded.JobExtraInfo == ["fx"]
+    assert loaded.GetJobExtraInfoKeyValue("PyblishFamily") == "render"
+    assert loaded.GetJobEnvironmentKeyValue("PYTHONPATH") == "/tools"
+
+
+def test_replay(plugins, tmpdir):
+    offline.repository.configs["Pyblish"]["OnJobFinishedPaths"] = plugins
+
+    data = json.dumps({"output": str(tmpdir.join("output.jsonl"))})
+    info = {"Name": "shot010",
+            "ExtraInfoKeyValue": {"PyblishContextData": data}}
+    events = [{"event": event, "job": info}
+              for event in ("OnJobFinished", "OnPreTask", "OnJobFinished")]
+
+    report = replay.replay(events)
+
+    assert report["events"] == 3
+    assert report["errors"] == 0
+    assert report["unconfigured_events"] == ["OnPreTask"]
+    assert "traced_memory_bytes" not in report
+    assert [entry["event"] for entry in published(tmpdir)] == [
+        "OnJobFinished", "OnJobFinished"
+    ]
+
+
+def test_history_errors_do_not_break_events(plugins, tmpdir):
+    config = offline.repository.configs["Pyblish"]
+    config["OnJobFinishedPaths"] = plugins
+
+    # a directory can not be opened as a database
+    config["ChunkHistoryPath"] = str(tmpdir)
+
+    listener = offline.load_event_plugin().GetDeadlineEventListener()
+    listener.OnJobFinished(job(tmpdir))
+    listener.Cleanup()
+
+    assert [entry["event"] for entry in published(tmpdir)] == [
+        "OnJobFinished"
+    ]
+
+
+def test_history_is_recorded(plugins, tmpdir):
+    path = str(tmpdir.join("history.db"))
+    offline.repository.configs["Pyblish"]["ChunkHistoryPath"] = path
+
+    finished = job(tmpdir)
+    finished.JobPlugin = "Nuke"
+    offline.repository.tasks[finished.JobId] = [
+        offline.Task("0", [1, 2], "Completed", 60.0)
+    ]
+
+    listener = offline.load_event_plugin().GetDeadlineEventListener()
+    listener.OnJobFinished(finished)
+    listener.Cleanup()
+
+    assert chunking.History(path).samples("Nuke") == [(2, 60.0)]
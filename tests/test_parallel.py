@@ -0,0 +1,121 @@
+import time
+import logging
+import threading
+
+import pyblish.api
+import pyblish.util
+
+from pyblish_deadline import parallel
+
+
+def make_plugins(log, lock):
+    """Plug-ins of a single order, with context plug-ins between"""
+
+    class Collect(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder
+
+        def process(self, context):
+            for name in ("c", "a", "d", "b"):
+                context.create_instance(name, family="render")
+
+    def record(name, target, delay=0.0):
+        time.sleep(delay)
+        with lock:
+            log.append((name, target))
+
+    class ValidateFirst(pyblish.api.InstancePlugin):
+        order = pyblish.api.ValidatorOrder
+
+        def process(self, instance):
+            # later instances finish first
+            record("first", instance.name,
+                   {"c": 0.04, "a": 0.03, "d": 0.02, "b": 0.01}[instance.name])
+
+    class ValidateContext(pyblish.api.ContextPlugin):
+        order = pyblish.api.ValidatorOrder
+
+        def process(self, context):
+            record("context", None)
+
+    class ValidateSecond(pyblish.api.InstancePlugin):
+        order = pyblish.api.ValidatorOrder
+
+        def process(self, instance):
+            if instance.name == "d":
+                raise ValueError("Invalid %s" % instance)
+            record("second", instance.name)
+
+    class Integrate(pyblish.api.InstancePlugin):
+        order = pyblish.api.IntegratorOrder
+
+        def process(self, instance):
+            record("integrate", instance.name)
+
+    return [Collect, ValidateFirst, ValidateContext, ValidateSecond,
+            Integrate]
+
+
+def summary(context):
+    return [(result["plugin"].__name__,
+             result["instance"].name if result["instance"] else None,
+             result["success"])
+            for result in context.data["results"]]
+
+
+def test_results_match_serial_publish():
+    lock = threading.Lock()
+
+    serial_log = []
+    serial = pyblish.util.publish(plugins=make_plugins(serial_log, lock))
+
+    log = []
+    context = parallel.publish(plugins=make_plugins(log, lock), workers=4)
+
+    # a failed validation stops before integration, in both
+    assert summary(context) == summary(serial)
+    assert not any(name == "integrate" for name, target in log)
+
+
+def test_context_plugins_run_in_their_place():
+    lock = threading.Lock()
+    log = []
+
+    parallel.publish(plugins=make_plugins(log, lock), workers=4)
+
+    names = [name for name, target in log]
+    assert names.index("context") == 4
+    assert set(names[:4]) == set(["first"])
+    assert set(names[5:]) == set(["second"])
+
+
+def test_root_logger_level_is_restored():
+    class Collect(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder
+
+        def process(self, context):
+            for index in range(8):
+                context.create_instance("instance%d" % index)
+
+    class Extract(pyblish.api.InstancePlugin):
+        order = pyblish.api.ExtractorOrder
+
+        def process(self, instance):
+            time.sleep(0.001)
+            self.log.info("Extracting %s" % instance)
+
+    class Integrate(pyblish.api.InstancePlugin):
+        order = pyblish.api.IntegratorOrder
+
+        def process(self, instance):
+            self.log.info("Integrating %s" % instance)
+
+    root = logging.getLogger()
+    level = root.level
+    root.setLevel(logging.WARNING)
+    try:
+        for run in range(20):
+            parallel.publish(plugins=[Collect, Extract, Integrate],
+                             workers=8)
+            assert root.level == logging.WARNING
+    finally:
+        root.setLevel(level)
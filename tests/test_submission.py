@@ -0,0 +1,283 @@
+import io
+import sys
+import json
+import time
+import functools
+import threading
+
+from pyblish_deadline import cli, infofile, submission
+
+
+class FakeSubmit(object):
+    """Records submitted job infos, and returns a job id for each
+
+    Jobs named in `fail` fail their deadlinecommand call. `delays` maps job
+    names to seconds to take, to finish calls out of order.
+    """
+
+    def __init__(self, fail=(), delays=None):
+        self.fail = fail
+        self.delays = delays or {}
+        self.calls = []
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, arguments):
+        if arguments[0] == "-SubmitMultipleJobs":
+            paths = [arguments[i + 1] for i, arg in enumerate(arguments)
+                     if arg == "-job"]
+        else:
+            paths = [arguments[0]]
+
+        infos = []
+        for path in paths:
+            with open(path) as f:
+                infos.append(infofile.load(f))
+
+        names = [info["Name"] for info in infos]
+        time.sleep(max(self.delays.get(name, 0) for name in names))
+
+        with self.lock:
+            self.calls.append(arguments)
+            if any(name in self.fail for name in names):
+                return "Error: submission failed"
+            output = []
+            for info in infos:
+                job_id = "id-" + info["Name"]
+                self.jobs[job_id] = info
+                output.append("JobID=%s" % job_id)
+            return "\n".join(output)
+
+    def dependencies(self, job_id):
+        info = self.jobs[job_id]
+        return sorted(value for key, value in info.items()
+                      if key.startswith("JobDependency"))
+
+
+def job(name, order=None):
+    result = {"job": {"Name": name, "Plugin": "Nuke"},
+              "plugin": {"SceneFile": name + ".nk"}}
+    if order is not None:
+        result["order"] = order
+    return result
+
+
+def test_orders_depend_on_previous_order():
+    command = FakeSubmit()
+    jobs = [job("c", 2), job("none"), job("a", 1), job("b", 1),
+            job("d", 3)]
+
+    job_ids = submission.submit(jobs, command=command)
+
+    assert job_ids == ["id-c", "id-none", "id-a", "id-b", "id-d"]
+    assert command.dependencies("id-a") == []
+    assert command.dependencies("id-b") == []
+    assert command.dependencies("id-c") == ["id-a", "id-b"]
+    assert command.dependencies("id-d") == ["id-c"]
+
+
+def test_jobs_without_order_are_submitted_last():
+    command = FakeSubmit()
+
+    submission.submit([job("none"), job("a", 1)], command=command)
+
+    assert len(command.calls) == 2
+    assert list(command.jobs) == ["id-a", "id-none"]
+    assert command.dependencies("id-none") == []
+
+
+def test_batches_submit_multiple_jobs():
+    command = FakeSubmit()
+    jobs = [job(name, 1) for name in "abc"]
+    jobs[0]["auxiliaryFiles"] = ["a.nk"]
+
+    job_ids = submission.submit(jobs, command=command, batch_size=2)
+
+    assert job_ids == ["id-a", "id-b", "id-c"]
+    assert len(command.calls) == 2
+
+    first, second = command.calls
+    assert first[0] == "-SubmitMultipleJobs"
+    assert first.count("-job") == 2
+    assert first[first.index("-job") + 3] == "a.nk"
+    assert "-SubmitMultipleJobs" not in second
+    assert "-job" not in second
+
+
+def test_ids_keep_input_order_with_workers():
+    # earlier jobs take longer, so their calls finish last
+    names = "abcdef"
+    delays = dict((name, 0.01 * (len(names) - i))
+                  for i, name in enumerate(names))
+    command = FakeSubmit(delays=delays)
+
+    job_ids = submission.submit([job(name, 1) for name in names],
+                                command=command, workers=4)
+
+    assert job_ids == ["id-" + name for name in names]
+
+
+def test_failed_batch_stops_later_orders():
+    command = FakeSubmit(fail=("b",))
+    jobs = [job("a", 1), job("b", 1), job("c", 2), job("none")]
+
+    try:
+        submission.submit(jobs, command=command)
+    except submission.SubmissionError as error:
+        assert error.job_ids == ["id-a", None, None, None]
+    else:
+        raise AssertionError("Expected a SubmissionError")
+
+    assert list(command.jobs) == ["id-a"]
+
+
+def test_cli_submit(tmpdir, monkeypatch):
+    manifest = tmpdir.join("manifest.json")
+    manifest.write(json.dumps({"jobs": [
+        dict(job("a", 1), contextData={"user": "farm"},
+             instanceData={"family": "render"}),
+        job("b", 2)
+    ]}))
+
+    command = FakeSubmit()
+    monkeypatch.setattr(submission, "submit",
+                        functools.partial(submission.submit, command=command))
+    monkeypatch.delenv("PYBLISH_DEADLINE_HISTORY", raising=False)
+
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    assert cli.main(["submit", str(manifest)]) == 0
+    assert json.loads(stdout.getvalue()) == [
+        {"name": "a", "order": 1, "jobId": "id-a"},
+        {"name": "b", "order": 2, "jobId": "id-b"}
+    ]
+
+    info = command.jobs["id-a"]["ExtraInfoKeyValue"]
+    assert json.loads(info["PyblishContextData"]) == {"user": "farm"}
+    assert info["PyblishFamily"] == "render"
+
+
+def test_cli_submit_failure(tmpdir, monkeypatch):
+    manifest = tmpdir.join("manifest.json")
+    manifest.write(json.dumps([job("a", 1), job("b", 2)]))
+
+    command = FakeSubmit(fail=("b",))
+    monkeypatch.setattr(submission, "submit",
+                        functools.partial(submission.submit, command=command))
+    monkeypatch.delenv("PYBLISH_DEADLINE_HISTORY", raising=False)
+
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    assert cli.main(["submit", str(manifest)]) == 1
+    assert json.loads(stdout.getvalue()) == [
+        {"name": "a", "order": 1, "jobId": "id-a"},
+        {"name": "b", "order": 2, "jobId": None}
+    ]
+
+
+class FakeDeadline(object):
+    """Reports the states of jobs from a list of polls"""
+
+    def __init__(self, polls):
+        self.polls = list(polls)
+        self.queries = []
+
+    def __call__(self, arguments):
+        assert arguments[0] == "-GetJob"
+        job_ids = arguments[1].split(",")
+        self.queries.append(job_ids)
+
+        states = self.polls.pop(0) if len(self.polls) > 1 else self.polls[0]
+        return "\n\n".join("ID=%s\nStatus=%s" % (job_id, states[job_id])
+                           for job_id in job_ids if job_id in states)
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def wait(command, clock, **kwargs):
+    return submission.wait_for_jobs(["a", "b"], command,
+                                    sleep=clock.sleep, clock=clock,
+                                    **kwargs)
+
+
+def test_wait_polls_pending_jobs_only():
+    command = FakeDeadline([{"a": "Active", "b": "Active"},
+                            {"a": "Completed", "b": "Active"},
+                            {"b": "Failed"}])
+    clock = FakeClock()
+
+    states = wait(command, clock, interval=5)
+
+    assert states == {"a": "Completed", "b": "Failed"}
+    assert command.queries == [["a", "b"], ["a", "b"], ["b"]]
+
+
+def test_wait_backs_off_while_nothing_changes():
+    command = FakeDeadline([{"a": "Active", "b": "Active"}] * 4 +
+                           [{"a": "Completed", "b": "Completed"}])
+    clock = FakeClock()
+
+    wait(command, clock, interval=4, max_interval=10, backoff=2)
+
+    # the first poll changes the states from Unknown
+    assert clock.sleeps == [4, 8, 10, 10]
+
+
+def test_wait_calls_back_after_each_poll():
+    command = FakeDeadline([{"a": "Active", "b": "Completed"},
+                            {"a": "Completed"}])
+    clock = FakeClock()
+    calls = []
+
+    wait(command, clock, callback=calls.append)
+
+    assert calls == [{"a": "Active", "b": "Completed"},
+                     {"a": "Completed", "b": "Completed"}]
+
+
+def test_wait_timeout_keeps_states():
+    command = FakeDeadline([{"a": "Completed", "b": "Active"}])
+    clock = FakeClock()
+
+    try:
+        wait(command, clock, timeout=30, interval=5)
+    except submission.WaitTimeout as error:
+        assert error.states == {"a": "Completed", "b": "Active"}
+    else:
+        raise AssertionError("Expected a WaitTimeout")
+
+    assert clock.now == 30
+
+
+def test_wait_marks_missing_jobs():
+    command = FakeDeadline([{"a": "Active", "b": "Active"},
+                            {"a": "Completed"}])
+    clock = FakeClock()
+
+    states = wait(command, clock)
+
+    assert states == {"a": "Completed", "b": submission.MISSING_STATE}
+
+
+def test_wait_keeps_polling_on_empty_output():
+    command = FakeDeadline([{}, {"a": "Completed", "b": "Completed"}])
+    clock = FakeClock()
+
+    states = wait(command, clock)
+
+    assert states == {"a": "Completed", "b": "Completed"}
+    assert len(command.queries) == 2